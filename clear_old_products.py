@@ -5,18 +5,17 @@ Clear old single-variant products so new master products get created
 
 import os
 from dotenv import load_dotenv
-from database_service import DatabaseService
 
-# Load environment variables
+# Load environment variables before the shared database_service reads them at import
 load_dotenv()
 
+from database_service import database_service
+
 def clear_old_products():
     """Clear old product designs so new master products get created"""
     print("🧹 Clearing old single-variant products")
     print("=" * 50)
     
-    database_service = DatabaseService()
-    
     # Target image ID that's been used in testing
     target_image_id = "685d8aee5638948d7abca30a"
     
@@ -10,6 +10,7 @@ from datetime import datetime, timedelta
 import structlog
 
 import asyncpg
+import orjson
 from asyncpg import Pool
 
 from ..config import Settings
@@ -328,19 +329,18 @@ class AsyncDatabaseService:
             
             self._metrics['total_queries'] += 1
             
-            designs = []
-            for row in rows:
-                designs.append({
+            return [
+                {
                     'design_id': row['design_id'],
                     'product_id': row['product_id'],
                     'variant_id': row['variant_id'],
                     'logo_url': row['logo_url'],
                     'mockup_url': row['mockup_url'],
-                    'metadata': json.loads(row['metadata']) if row['metadata'] else {},
+                    'metadata': orjson.loads(row['metadata']) if row['metadata'] else {},
                     'created_at': row['created_at'].isoformat() if row['created_at'] else None
-                })
-            
-            return designs
+                }
+                for row in rows
+            ]
             
         except Exception as e:
             logger.error("Failed to get recent designs", error=str(e))
@@ -349,6 +349,22 @@ class AsyncDatabaseService:
             # Fallback to sync service
             return await self._fallback_get_recent_designs(limit, hours)
     
+    def dumps_response(self, obj: Any) -> bytes:
+        """
+        Serialize query results for an HTTP response body
+        
+        Returns bytes so callers can hand them straight to
+        Response(content=..., media_type="application/json") without
+        a str -> bytes round-trip.
+        
+        Args:
+            obj: JSON-serializable result (e.g. from get_recent_designs)
+            
+        Returns:
+            UTF-8 encoded JSON
+        """
+        return orjson.dumps(obj, option=orjson.OPT_NAIVE_UTC)
+    
     async def _fallback_save_design(
         self,
         design_id: str,
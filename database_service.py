@@ -9,12 +9,40 @@ import json
 import uuid
 import logging
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Protocol
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class DatabaseBackend(Protocol):
+    """Public surface shared by every drop storage backend"""
+
+    def save_product_design(self, design_data: Dict) -> str: ...
+
+    def find_existing_product_design(self, blueprint_id: int, print_provider_id: int, team_logo_image_id: str, variant_id: int = None) -> Optional[Dict]: ...
+
+    def get_product_design(self, design_id: str) -> Optional[Dict]: ...
+
+    def get_active_product_designs(self) -> List[Dict]: ...
+
+    def create_customer_order(self, order_data: Dict) -> str: ...
+
+    def update_order_payment_status(self, order_id: str, payment_status: str, stripe_payment_intent_id: str = None) -> bool: ...
+
+    def update_order_printify_id(self, order_id: str, printify_order_id: str) -> bool: ...
+
+    def get_order_by_id(self, order_id: str) -> dict: ...
+
+    def add_order_item(self, order_id: str, item_data: Dict) -> str: ...
+
+    def save_shipping_address(self, order_id: str, address_data: Dict) -> str: ...
+
+    def get_order_with_items(self, order_id: str) -> Optional[Dict]: ...
+
+    def generate_drop_url(self, design_id: str, base_domain: str = "https://mim-drop.vercel.app") -> str: ...
+
+
 class DatabaseService:
     def __init__(self, storage_file: str = "drop_data.json", supabase_url: str = None, supabase_key: str = None):
         """Initialize database service with file-based storage or Supabase"""
@@ -32,8 +60,11 @@ class DatabaseService:
                 self.supabase = None
         
         # Fallback to JSON files if no Supabase
+        self._design_key_index: Dict[tuple, str] = {}
         if not self.supabase:
             self.data = self._load_data()
+            for design_id, design in self.data["product_designs"].items():
+                self._index_design(design_id, design)
     
     def _load_data(self) -> Dict:
         """Load data from storage file"""
@@ -66,9 +97,39 @@ class DatabaseService:
         except Exception as e:
             logger.error(f"Error saving data: {e}")
     
+    def _index_design(self, design_id: str, design: Dict):
+        """Record an active file-backed design under its master and variant lookup keys"""
+        if design.get("status") != "active":
+            return
+        base_key = (design.get("blueprint_id"), design.get("print_provider_id"), design.get("team_logo_image_id"))
+        # setdefault keeps the first match, same as the old linear scan
+        self._design_key_index.setdefault(base_key + (None,), design_id)
+        self._design_key_index.setdefault(base_key + (design.get("default_variant_id"),), design_id)
+    
+    def _lookup_indexed_design(self, key: tuple) -> Optional[str]:
+        """Return the ID of the active design indexed under key, reindexing if the entry went stale"""
+        design_id = self._design_key_index.get(key)
+        design = self.data["product_designs"].get(design_id)
+        if design_id and (design is None or design.get("status") != "active"):
+            # The design was removed or deactivated since it was indexed - reindex what's left
+            self._design_key_index.clear()
+            for stored_id, stored in self.data["product_designs"].items():
+                self._index_design(stored_id, stored)
+            design_id = self._design_key_index.get(key)
+        return design_id
+    
     def save_product_design(self, design_data: Dict) -> str:
         """Save a product design from Slack bot"""
         try:
+            if not self.supabase:
+                # Identical design already stored - hand back its ID instead of a duplicate row
+                key = (design_data["blueprint_id"], design_data["print_provider_id"],
+                       design_data["team_logo_image_id"], design_data.get("default_variant_id"))
+                existing_id = self._lookup_indexed_design(key)
+                if existing_id and self.data["product_designs"][existing_id].get("printify_product_id") == design_data.get("printify_product_id"):
+                    logger.info(f"Product design already exists: {existing_id}")
+                    return existing_id
+            
             design_id = str(uuid.uuid4())
             
             product_design = {
@@ -102,6 +163,7 @@ class DatabaseService:
             else:
                 # Save to JSON file
                 self.data["product_designs"][design_id] = product_design
+                self._index_design(design_id, product_design)
                 self._save_data()
                 logger.info(f"Saved product design to file: {design_id}")
                 return design_id
@@ -127,19 +189,11 @@ class DatabaseService:
                     logger.info(f"Found existing product design for logo {team_logo_image_id}, blueprint {blueprint_id}, variant {variant_id}")
                     return result.data[0]
             else:
-                # Search JSON file
-                for design_id, design in self.data["product_designs"].items():
-                    if (design.get("blueprint_id") == blueprint_id and 
-                        design.get("print_provider_id") == print_provider_id and 
-                        design.get("team_logo_image_id") == team_logo_image_id and
-                        design.get("status") == "active"):
-                        
-                        # Check variant_id if provided
-                        if variant_id is not None and design.get("default_variant_id") != variant_id:
-                            continue
-                            
-                        logger.info(f"Found existing product design for logo {team_logo_image_id}, blueprint {blueprint_id}, variant {variant_id}")
-                        return design
+                # Look up the JSON file designs by key (variant None matches the master product)
+                design_id = self._lookup_indexed_design((blueprint_id, print_provider_id, team_logo_image_id, variant_id))
+                if design_id:
+                    logger.info(f"Found existing product design for logo {team_logo_image_id}, blueprint {blueprint_id}, variant {variant_id}")
+                    return self.data["product_designs"][design_id]
             
             return None
             
@@ -149,19 +203,18 @@ class DatabaseService:
 
     def get_product_design(self, design_id: str) -> Optional[Dict]:
         """Get a product design by ID"""
+        if not self.supabase:
+            # JSON file lookup can't raise
+            return self.data["product_designs"].get(design_id)
+        
         try:
-            if self.supabase:
-                # Query Supabase first
-                result = self.supabase.table("product_designs").select("*").eq("id", design_id).execute()
-                if result.data and len(result.data) > 0:
-                    logger.info(f"Retrieved product design from Supabase: {design_id}")
-                    return result.data[0]
-                else:
-                    logger.warning(f"Product design {design_id} not found in Supabase")
-                    return None
+            result = self.supabase.table("product_designs").select("*").eq("id", design_id).execute()
+            if result.data and len(result.data) > 0:
+                logger.info(f"Retrieved product design from Supabase: {design_id}")
+                return result.data[0]
             else:
-                # Fallback to JSON file
-                return self.data["product_designs"].get(design_id)
+                logger.warning(f"Product design {design_id} not found in Supabase")
+                return None
         except Exception as e:
             logger.error(f"Error getting product design {design_id}: {e}")
             return None
@@ -237,12 +290,11 @@ class DatabaseService:
             return False
 
     def get_order_by_id(self, order_id: str) -> dict:
-        """Get order details by order ID"""
-        try:
-            return self.data["customer_orders"].get(order_id)
-        except Exception as e:
-            logger.error(f"Error getting order {order_id}: {e}")
-            return None
+        """Get order details by order ID (lookup errors propagate to the caller)"""
+        if self.supabase:
+            result = self.supabase.table("customer_orders").select("*").eq("id", order_id).execute()
+            return result.data[0] if result.data else None
+        return self.data["customer_orders"].get(order_id)
     
     def add_order_item(self, order_id: str, item_data: Dict) -> str:
         """Add an item to an order"""
@@ -334,8 +386,18 @@ class DatabaseService:
         """Generate drop URL for a product design"""
         return f"{base_domain}/design/{design_id}"
 
-# Global instance - will be initialized with Supabase credentials if available
-database_service = DatabaseService(
-    supabase_url=os.getenv("SUPABASE_URL"),
-    supabase_key=os.getenv("SUPABASE_SERVICE_KEY")
-) 
\ No newline at end of file
+def create_database_service() -> DatabaseBackend:
+    """Build the storage backend selected by the environment.
+
+    Supabase is used when SUPABASE_URL and SUPABASE_SERVICE_KEY are set,
+    otherwise designs are kept in the JSON file named by DROP_DATA_FILE.
+    """
+    return DatabaseService(
+        storage_file=os.getenv("DROP_DATA_FILE", "drop_data.json"),
+        supabase_url=os.getenv("SUPABASE_URL"),
+        supabase_key=os.getenv("SUPABASE_SERVICE_KEY")
+    )
+
+# Global instance - importers share this one backend instead of building their own
+database_service = create_database_service()
+ 
\ No newline at end of file
@@ -4,19 +4,38 @@ Debug script to test mockup generation for all 3 products
 This will help us see exactly why the hoodie and hat aren't generating
 """
 
+import io
+import os
+import sys
 import json
 import logging
-from product_service import ProductService
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from product_service import ProductService, load_cache
 from printify_service import PrintifyService
 
 # Setup logging to see what's happening
 logging.basicConfig(level=logging.INFO, format='%(levelname)s:%(name)s:%(message)s')
 logger = logging.getLogger(__name__)
 
+# Successful design results are cached here so reruns skip the Printify round-trip.
+# Set FORCE_REGEN=1 to ignore the cache and create fresh designs.
+MOCKUP_CACHE_FILE = Path(".debug_mockup_cache.json")
+
+# Report lines are buffered and written to stdout once per section
+out = io.StringIO()
+
+def flush_output():
+    """Write the buffered section report to stdout in one go"""
+    sys.stdout.write(out.getvalue())
+    sys.stdout.flush()
+    out.seek(0)
+    out.truncate()
+
 def test_product_cache():
     """Test that our product cache has the expected products"""
-    print("🧪 TESTING PRODUCT CACHE")
-    print("=" * 50)
+    print("🧪 TESTING PRODUCT CACHE", file=out)
+    print("=" * 50, file=out)
     
     service = ProductService()
     
@@ -30,26 +49,26 @@ def test_product_cache():
     for product_id, expected_name in test_products:
         product = service.get_product_by_id(product_id)
         if product:
-            print(f"✅ {product_id}: {product['title']}")
-            print(f"   Blueprint ID: {product.get('blueprint_id')}")
-            print(f"   Print Provider ID: {product.get('print_provider_id')} / {product.get('primary_print_provider_id')}")
-            print(f"   Variants: {len(product.get('variants', []))}")
+            print(f"✅ {product_id}: {product['title']}", file=out)
+            print(f"   Blueprint ID: {product.get('blueprint_id')}", file=out)
+            print(f"   Print Provider ID: {product.get('print_provider_id')} / {product.get('primary_print_provider_id')}", file=out)
+            print(f"   Variants: {len(product.get('variants', []))}", file=out)
             
             # Test variant selection
             if product_id == "92":  # College Hoodie - use first variant
                 first_variant = product.get('variants', [{}])[0] if product.get('variants') else None
-                print(f"   First variant: {first_variant.get('id') if first_variant else 'NONE'} - {first_variant.get('color') if first_variant else 'N/A'}")
+                print(f"   First variant: {first_variant.get('id') if first_variant else 'NONE'} - {first_variant.get('color') if first_variant else 'N/A'}", file=out)
             else:
                 black_variant = service._find_variant_by_color(product_id, 'Black')
-                print(f"   Black variant: {black_variant.get('id') if black_variant else 'NOT FOUND'}")
+                print(f"   Black variant: {black_variant.get('id') if black_variant else 'NOT FOUND'}", file=out)
         else:
-            print(f"❌ {product_id}: NOT FOUND IN CACHE")
-        print()
+            print(f"❌ {product_id}: NOT FOUND IN CACHE", file=out)
+        print(file=out)
 
 def test_printify_service():
     """Test Printify service with each product"""
-    print("🔧 TESTING PRINTIFY SERVICE")
-    print("=" * 50)
+    print("🔧 TESTING PRINTIFY SERVICE", file=out)
+    print("=" * 50, file=out)
     
     service = ProductService()
     printify = PrintifyService()
@@ -57,52 +76,75 @@ def test_printify_service():
     # Use a test image ID (you can replace with actual one)
     test_image_id = "685d8aee5638948d7abca30a"  # From your logs
     
+    force_regen = os.getenv("FORCE_REGEN") == "1"
+    cache = {}
+    if MOCKUP_CACHE_FILE.exists() and not force_regen:
+        cache = json.loads(MOCKUP_CACHE_FILE.read_text())
+    
     test_products = [
         ("12", "Unisex Jersey Short Sleeve Tee"),
         ("92", "Unisex College Hoodie"), 
         ("1447", "Classic Dad Cap")
     ]
     
-    for product_id, product_name in test_products:
-        print(f"Testing {product_name} (ID: {product_id})")
+    # Each product blocks on its own Printify round-trip, so overlap them
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        reports = executor.map(
+            lambda args: _probe(service, printify, cache, test_image_id, *args),
+            test_products
+        )
+        for report in reports:
+            out.write(report)
+    
+    MOCKUP_CACHE_FILE.write_text(json.dumps(cache))
+
+def _probe(service, printify, cache, test_image_id, product_id, product_name) -> str:
+    """Run the design-creation check for one product and return its report"""
+    report = io.StringIO()
+    print(f"Testing {product_name} (ID: {product_id})", file=report)
+    
+    product = service.get_product_by_id(product_id)
+    if not product:
+        print(f"❌ Product {product_id} not found in cache", file=report)
+        return report.getvalue()
         
-        product = service.get_product_by_id(product_id)
-        if not product:
-            print(f"❌ Product {product_id} not found in cache")
-            continue
-            
-        # Get variant
-        if product_id == "92":  # College Hoodie
-            variant = product.get('variants', [{}])[0] if product.get('variants') else None
-        else:
-            variant = service._find_variant_by_color(product_id, 'Black')
-            
-        if not variant:
-            print(f"❌ No variant found for {product_id}")
-            continue
-            
-        # Get provider info
-        blueprint_id = product.get('blueprint_id')
-        print_provider_id = product.get('print_provider_id') or product.get('primary_print_provider_id')
-        variant_id = variant.get('id')
+    # Get variant
+    if product_id == "92":  # College Hoodie
+        variant = product.get('variants', [{}])[0] if product.get('variants') else None
+    else:
+        variant = service._find_variant_by_color(product_id, 'Black')
         
-        print(f"   Blueprint: {blueprint_id}")
-        print(f"   Provider: {print_provider_id}")
-        print(f"   Variant: {variant_id} ({variant.get('color')}/{variant.get('size')})")
+    if not variant:
+        print(f"❌ No variant found for {product_id}", file=report)
+        return report.getvalue()
         
-        # Test if all required fields are present
-        if not blueprint_id:
-            print(f"❌ Missing blueprint_id for {product_id}")
-        elif not print_provider_id:
-            print(f"❌ Missing print_provider_id for {product_id}")
-        elif not variant_id:
-            print(f"❌ Missing variant_id for {product_id}")
-        else:
-            print(f"✅ All required fields present for {product_id}")
-            
-            # Try to create design (this is where it might fail)
-            try:
-                print(f"   🔄 Attempting to create design...")
+    # Get provider info
+    blueprint_id = product.get('blueprint_id')
+    print_provider_id = product.get('print_provider_id') or product.get('primary_print_provider_id')
+    variant_id = variant.get('id')
+    
+    print(f"   Blueprint: {blueprint_id}", file=report)
+    print(f"   Provider: {print_provider_id}", file=report)
+    print(f"   Variant: {variant_id} ({variant.get('color')}/{variant.get('size')})", file=report)
+    
+    # Test if all required fields are present
+    if not blueprint_id:
+        print(f"❌ Missing blueprint_id for {product_id}", file=report)
+    elif not print_provider_id:
+        print(f"❌ Missing print_provider_id for {product_id}", file=report)
+    elif not variant_id:
+        print(f"❌ Missing variant_id for {product_id}", file=report)
+    else:
+        print(f"✅ All required fields present for {product_id}", file=report)
+        
+        # Try to create design (this is where it might fail)
+        try:
+            cache_key = f"{blueprint_id}:{print_provider_id}:{variant_id}:{test_image_id}"
+            result = cache.get(cache_key)
+            if result:
+                print(f"   ♻️  Using cached design (cached)", file=report)
+            else:
+                print(f"   🔄 Attempting to create design...", file=report)
                 result = printify.create_product_design(
                     blueprint_id=blueprint_id,
                     print_provider_id=print_provider_id,
@@ -110,23 +152,26 @@ def test_printify_service():
                     image_id=test_image_id,
                     product_title=f"Test {product_name}"
                 )
-                
                 if result.get("success"):
-                    print(f"   ✅ Design creation SUCCEEDED for {product_id}")
-                    print(f"      Mockup URL: {result.get('mockup_url', 'N/A')}")
-                else:
-                    print(f"   ❌ Design creation FAILED for {product_id}")
-                    print(f"      Error: {result.get('error', 'Unknown error')}")
-                    
-            except Exception as e:
-                print(f"   ❌ Exception during design creation for {product_id}: {e}")
-        
-        print()
+                    cache[cache_key] = result
+            
+            if result.get("success"):
+                print(f"   ✅ Design creation SUCCEEDED for {product_id}", file=report)
+                print(f"      Mockup URL: {result.get('mockup_url', 'N/A')}", file=report)
+            else:
+                print(f"   ❌ Design creation FAILED for {product_id}", file=report)
+                print(f"      Error: {result.get('error', 'Unknown error')}", file=report)
+                
+        except Exception as e:
+            print(f"   ❌ Exception during design creation for {product_id}: {e}", file=report)
+    
+    print(file=report)
+    return report.getvalue()
 
 def check_cache_files():
     """Check that cache files are properly updated"""
-    print("📁 CHECKING CACHE FILES")
-    print("=" * 50)
+    print("📁 CHECKING CACHE FILES", file=out)
+    print("=" * 50, file=out)
     
     files_to_check = [
         "top3_product_cache_optimized.json",
@@ -135,42 +180,43 @@ def check_cache_files():
     
     for file_path in files_to_check:
         try:
-            with open(file_path, 'r') as f:
-                cache = json.load(f)
+            cache = load_cache(file_path)
             
-            print(f"✅ {file_path}")
-            print(f"   Products: {len(cache.get('products', {}))}")
-            print(f"   Categories: {list(cache.get('category_info', {}).keys())}")
+            print(f"✅ {file_path}", file=out)
+            print(f"   Products: {len(cache.get('products', {}))}", file=out)
+            print(f"   Categories: {list(cache.get('category_info', {}).keys())}", file=out)
             
             # Check for our specific products
             products = cache.get('products', {})
             for product_id in ['12', '92', '1447']:
                 if product_id in products:
                     product = products[product_id]
-                    print(f"   {product_id}: {product.get('title')} ✅")
+                    print(f"   {product_id}: {product.get('title')} ✅", file=out)
                 else:
-                    print(f"   {product_id}: NOT FOUND ❌")
+                    print(f"   {product_id}: NOT FOUND ❌", file=out)
             
         except Exception as e:
-            print(f"❌ {file_path}: Error - {e}")
+            print(f"❌ {file_path}: Error - {e}", file=out)
         
-        print()
+        print(file=out)
 
 if __name__ == "__main__":
-    print("🚀 DEBUGGING MOCKUP GENERATION ISSUES")
-    print("=" * 60)
-    print()
+    print("🚀 DEBUGGING MOCKUP GENERATION ISSUES", file=out)
+    print("=" * 60, file=out)
+    print(file=out)
     
     try:
-        check_cache_files()
-        test_product_cache()
-        test_printify_service()
+        for section in (check_cache_files, test_product_cache, test_printify_service):
+            section()
+            flush_output()
         
-        print("🏁 DEBUG COMPLETE")
-        print("=" * 60)
-        print("Check the output above to see where the issues are occurring.")
+        print("🏁 DEBUG COMPLETE", file=out)
+        print("=" * 60, file=out)
+        print("Check the output above to see where the issues are occurring.", file=out)
+        flush_output()
         
     except Exception as e:
-        print(f"❌ Debug script failed: {e}")
+        print(f"❌ Debug script failed: {e}", file=out)
+        flush_output()
         import traceback
         traceback.print_exc()
\ No newline at end of file
@@ -4,81 +4,107 @@ Debug: Examine the actual product structure to see mockup images
 """
 
 import os
+import sys
+import logging
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-def debug_product_images():
+# Report through logging so per-image lines are only formatted when emitted
+logging.basicConfig(level=logging.INFO, format='%(message)s', handlers=[logging.StreamHandler()])
+logger = logging.getLogger(__name__)
+
+def debug_product_images(product_ids=None):
     """Debug what images Printify actually generates for products with multiple variants"""
-    print("🔍 Debugging Product Images Structure")
-    print("=" * 60)
+    logger.info("🔍 Debugging Product Images Structure")
+    logger.info("=" * 60)
     
     api_token = os.getenv('PRINTIFY_API_TOKEN')
     shop_id = os.getenv('PRINTIFY_SHOP_ID', '9564969')
     
     if not api_token:
-        print("❌ PRINTIFY_API_TOKEN not found")
+        logger.error("❌ PRINTIFY_API_TOKEN not found")
         return
     
-    headers = {
+    # One pooled session so concurrent fetches reuse TLS connections and retry rate limits
+    session = requests.Session()
+    session.headers.update({
         "Authorization": f"Bearer {api_token}",
         "Content-Type": "application/json"
-    }
+    })
+    retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+    session.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=retry))
+    
+    # Default to the master product we just created
+    product_ids = product_ids or ["68641785864ba497d50b113f"]
+    
+    def fetch(product_id):
+        try:
+            return session.get(f"https://api.printify.com/v1/shops/{shop_id}/products/{product_id}.json")
+        except Exception as e:
+            return e
     
-    # Use the master product we just created
-    product_id = "68641785864ba497d50b113f"
+    # Fetch every product concurrently, then report in the order requested
+    with session, ThreadPoolExecutor(max_workers=16) as executor:
+        responses = list(executor.map(fetch, product_ids))
     
-    print(f"📦 Examining product: {product_id}")
+    for product_id, response in zip(product_ids, responses):
+        _report_product_images(product_id, response)
+
+def _report_product_images(product_id, response):
+    """Log the image breakdown for one fetched product"""
+    logger.info("📦 Examining product: %s", product_id)
     
     try:
-        response = requests.get(
-            f"https://api.printify.com/v1/shops/{shop_id}/products/{product_id}.json",
-            headers=headers
-        )
+        if isinstance(response, Exception):
+            raise response
         
         if response.status_code == 200:
             product_data = response.json()
             
-            print(f"✅ Product found: {product_data.get('title')}")
-            print(f"   Total variants: {len(product_data.get('variants', []))}")
+            logger.info("✅ Product found: %s", product_data.get('title'))
+            logger.info("   Total variants: %d", len(product_data.get('variants', [])))
             
             images = product_data.get('images', [])
-            print(f"   Total images: {len(images)}")
+            logger.info("   Total images: %d", len(images))
             
             # Analyze each image
             for i, image in enumerate(images):
-                print(f"\n📸 Image {i+1}:")
-                print(f"   URL: {image.get('src')}")
-                print(f"   Position: {image.get('position')}")
-                print(f"   Is Default: {image.get('is_default')}")
-                print(f"   Variant IDs: {image.get('variant_ids', [])[:10]}..." if len(image.get('variant_ids', [])) > 10 else f"   Variant IDs: {image.get('variant_ids', [])}")
+                variant_ids = image.get('variant_ids', [])
+                logger.info("\n📸 Image %d:", i + 1)
+                logger.info("   URL: %s", image.get('src'))
+                logger.info("   Position: %s", image.get('position'))
+                logger.info("   Is Default: %s", image.get('is_default'))
+                logger.info("   Variant IDs: %s%s", variant_ids[:10], "..." if len(variant_ids) > 10 else "")
                 
                 # Check if this image is for specific variants
-                variant_ids = image.get('variant_ids', [])
                 if len(variant_ids) == 1:
-                    print(f"   🎯 This is a variant-specific image!")
+                    logger.info("   🎯 This is a variant-specific image!")
                 elif len(variant_ids) > 100:
-                    print(f"   📋 This covers many/all variants")
+                    logger.info("   📋 This covers many/all variants")
                 else:
-                    print(f"   📝 This covers {len(variant_ids)} variants")
+                    logger.info("   📝 This covers %d variants", len(variant_ids))
             
             # Look for patterns in image URLs
-            print(f"\n🔍 URL Analysis:")
+            logger.info("\n🔍 URL Analysis:")
             unique_urls = set(img.get('src') for img in images)
-            print(f"   Unique image URLs: {len(unique_urls)}")
+            logger.info("   Unique image URLs: %d", len(unique_urls))
             
             if len(unique_urls) == 1:
-                print(f"   ⚠️ All images have the same URL - Printify may not generate separate mockups")
+                logger.info("   ⚠️ All images have the same URL - Printify may not generate separate mockups")
             else:
-                print(f"   ✅ Found {len(unique_urls)} different image URLs")
+                logger.info("   ✅ Found %d different image URLs", len(unique_urls))
                 
         else:
-            print(f"❌ Failed to get product: {response.status_code} - {response.text}")
+            logger.error("❌ Failed to get product: %s - %s", response.status_code, response.text)
             
     except Exception as e:
-        print(f"❌ Error: {e}")
+        logger.error("❌ Error: %s", e)
 
 if __name__ == "__main__":
-    debug_product_images()
\ No newline at end of file
+    debug_product_images(sys.argv[1:])
\ No newline at end of file
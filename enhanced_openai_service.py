@@ -7,20 +7,39 @@ and multi-color handling based on the validation testing results.
 """
 
 import os
+import bisect
+import copy
+import hashlib
 import logging
 import re
-from openai import OpenAI
+from collections import OrderedDict
+
+import orjson
 from typing import Dict, Optional, List
 from dotenv import load_dotenv
 
+from openai_http import create_openai_client
+
 # Load environment variables
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of LLM analysis results kept in memory
+ANALYSIS_CACHE_SIZE = 4096
+
+# Product-type keywords matched against the message's word set
+HOODIE_WORDS = frozenset({"hoodie", "hoodies", "sweatshirt", "sweatshirts"})
+SHIRT_WORDS = frozenset({"shirt", "shirts", "tshirt", "tshirts", "tee", "tees", "jersey", "jerseys"})
+_WORD_RE = re.compile(r"[a-z]+")
+
+# Words that mark the following color as the primary one, in priority order
+PRIORITY_PHRASES = ("mainly", "primarily", "prefer", "want", "looking for", "in")
+_PRIORITY_RE = re.compile(r"\b(" + "|".join(re.escape(p) for p in PRIORITY_PHRASES) + r")\b")
+
 class EnhancedOpenAIService:
     def __init__(self):
-        self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        self.client = create_openai_client()
         self.color_families = {
             "red": ["red", "maroon", "burgundy", "crimson", "scarlet", "cherry"],
             "blue": ["blue", "navy", "royal blue", "royal", "cobalt", "azure"],
@@ -34,9 +53,38 @@ class EnhancedOpenAIService:
             "pink": ["pink", "rose", "blush", "coral"],
             "brown": ["brown", "tan", "khaki", "beige", "chocolate"]
         }
+        # One alternation over every color name (longest first so "royal blue" beats "royal")
+        self._color_to_family = {color: family for family, colors in self.color_families.items() for color in colors}
+        self._analysis_cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self._color_regex = re.compile(
+            r'\b(' + '|'.join(re.escape(c) for c in sorted(self._color_to_family, key=len, reverse=True)) + r')\b'
+        )
         
+    def _cache_key(self, method: str, *parts: str) -> str:
+        """Hash a method name and its inputs into an analysis cache key"""
+        return hashlib.sha256("\x00".join((method,) + tuple(p or "" for p in parts)).encode()).hexdigest()
+    
+    def _get_cached_analysis(self, key: str) -> Optional[Dict]:
+        """Return a copy of a cached LLM result, refreshing its LRU position"""
+        result = self._analysis_cache.get(key)
+        if result is None:
+            return None
+        self._analysis_cache.move_to_end(key)
+        return copy.deepcopy(result)
+    
+    def _cache_analysis(self, key: str, result: Dict):
+        """Store an LLM result, evicting the least recently used entry when full"""
+        self._analysis_cache[key] = copy.deepcopy(result)
+        self._analysis_cache.move_to_end(key)
+        if len(self._analysis_cache) > ANALYSIS_CACHE_SIZE:
+            self._analysis_cache.popitem(last=False)
+    
     def analyze_parent_message(self, message: str, context: str = "") -> Dict:
         """Enhanced parent message analysis with better color detection"""
+        cache_key = self._cache_key("analyze_parent_message", message, context)
+        cached = self._get_cached_analysis(cache_key)
+        if cached is not None:
+            return cached
         
         system_prompt = """You are a helpful assistant for a youth sports team merchandise service. 
         Parents message you wanting to customize products for their kids' sports teams.
@@ -74,17 +122,17 @@ class EnhancedOpenAIService:
         
         try:
             response = self.client.chat.completions.create(
-                model="gpt-4-turbo-preview",
+                model="gpt-4o-mini",
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": f"Parent message: {message}\nContext: {context}"}
                 ],
+                response_format={"type": "json_object"},
                 temperature=0.3,
                 max_tokens=500
             )
             
-            import json
-            result = json.loads(response.choices[0].message.content)
+            result = orjson.loads(response.choices[0].message.content)
             
             # Enhance with local color analysis as backup
             local_color_analysis = self._analyze_colors_locally(message)
@@ -93,6 +141,7 @@ class EnhancedOpenAIService:
                 result['secondary_colors'] = local_color_analysis.get('secondary_colors', [])
                 result['color_context'] = local_color_analysis.get('context', 'unknown')
             
+            self._cache_analysis(cache_key, result)
             return result
             
         except Exception as e:
@@ -102,6 +151,10 @@ class EnhancedOpenAIService:
     
     def analyze_color_request_enhanced(self, message: str, logo_url: str = None) -> Dict:
         """Enhanced color analysis with better multi-color handling"""
+        cache_key = self._cache_key("analyze_color_request_enhanced", message, logo_url)
+        cached = self._get_cached_analysis(cache_key)
+        if cached is not None:
+            return cached
         
         system_prompt = """You are an expert in color analysis for sports team merchandise. 
         Analyze the user's message to identify their color preferences with the following priorities:
@@ -130,17 +183,17 @@ class EnhancedOpenAIService:
                 context_message += f"\nLogo URL provided: {logo_url}"
                 
             response = self.client.chat.completions.create(
-                model="gpt-4-turbo-preview",
+                model="gpt-4o-mini",
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": context_message}
                 ],
+                response_format={"type": "json_object"},
                 temperature=0.2,
                 max_tokens=300
             )
             
-            import json
-            result = json.loads(response.choices[0].message.content)
+            result = orjson.loads(response.choices[0].message.content)
             
             # Enhance with local analysis
             local_analysis = self._analyze_colors_locally(message)
@@ -150,6 +203,7 @@ class EnhancedOpenAIService:
                 result['confidence'] = local_analysis['confidence']
                 result['reasoning'] = f"Local analysis (confidence: {local_analysis['confidence']:.2f})"
             
+            self._cache_analysis(cache_key, result)
             return result
             
         except Exception as e:
@@ -160,21 +214,9 @@ class EnhancedOpenAIService:
         """Local color analysis as fallback and enhancement"""
         text_lower = text.lower()
         
-        # Find all color mentions with positions
-        color_matches = []
-        for family, colors in self.color_families.items():
-            for color in colors:
-                pattern = r'\b' + re.escape(color) + r'\b'
-                matches = list(re.finditer(pattern, text_lower))
-                for match in matches:
-                    color_matches.append({
-                        'color': color,
-                        'family': family,
-                        'position': match.start(),
-                        'end': match.end()
-                    })
-        
-        if not color_matches:
+        # Most messages mention no color - bail out before building any matches
+        first_match = self._color_regex.search(text_lower)
+        if not first_match:
             return {
                 'primary_color': None,
                 'secondary_colors': [],
@@ -182,11 +224,24 @@ class EnhancedOpenAIService:
                 'context': 'no_colors_found'
             }
         
-        # Sort by position
-        color_matches.sort(key=lambda x: x['position'])
+        # Find all color mentions with positions, resuming from the first hit
+        color_matches = [
+            {
+                'color': match.group(1),
+                'family': self._color_to_family[match.group(1)],
+                'position': match.start(),
+                'end': match.end()
+            }
+            for match in self._color_regex.finditer(text_lower, first_match.start())
+        ]
+        
+        # One pass over the text finds the first position of every priority phrase
+        phrase_positions = {}
+        for match in _PRIORITY_RE.finditer(text_lower):
+            phrase_positions.setdefault(match.group(1), match.start())
         
         # Determine primary color
-        primary_color = self._determine_primary_color_local(text_lower, color_matches)
+        primary_color = self._determine_primary_color_local(phrase_positions, color_matches)
         secondary_colors = [m['color'] for m in color_matches if m['color'] != primary_color['color']]
         
         # Calculate confidence
@@ -194,12 +249,9 @@ class EnhancedOpenAIService:
         if len(color_matches) == 1:
             confidence = 0.9
         
-        # Check for priority phrases
-        priority_phrases = ["mainly", "primarily", "prefer", "want", "looking for"]
-        for phrase in priority_phrases:
-            if phrase in text_lower:
-                confidence += 0.1
-                break
+        # Explicit preference words (but not the weak "in" cue) raise confidence
+        if phrase_positions.keys() - {"in"}:
+            confidence += 0.1
         
         return {
             'primary_color': primary_color['color'],
@@ -209,37 +261,32 @@ class EnhancedOpenAIService:
             'context': 'multiple_colors' if len(color_matches) > 1 else 'single_color'
         }
     
-    def _determine_primary_color_local(self, text: str, color_matches: List[Dict]) -> Dict:
+    def _determine_primary_color_local(self, phrase_positions: Dict[str, int], color_matches: List[Dict]) -> Dict:
         """Determine primary color from multiple matches"""
         if len(color_matches) == 1:
             return color_matches[0]
         
-        # Check for priority phrases
-        priority_phrases = ["mainly", "primarily", "prefer", "want", "looking for", "in"]
-        for phrase in priority_phrases:
-            phrase_pos = text.find(phrase)
-            if phrase_pos != -1:
-                # Find closest color after priority phrase
-                for color_match in color_matches:
-                    if color_match['position'] > phrase_pos:
-                        return color_match
+        # Closest color after the highest-priority phrase that has one
+        color_positions = [m['position'] for m in color_matches]
+        for phrase in PRIORITY_PHRASES:
+            if phrase in phrase_positions:
+                idx = bisect.bisect_right(color_positions, phrase_positions[phrase])
+                if idx < len(color_matches):
+                    return color_matches[idx]
         
-        # For "X and Y" patterns, prioritize first color
-        if " and " in text:
-            return color_matches[0]
-        
-        # Default to first mentioned
+        # Otherwise (including "X and Y" patterns) the first mentioned color wins
         return color_matches[0]
     
     def _fallback_analysis(self, message: str, context: str = "") -> Dict:
         """Fallback analysis when OpenAI fails"""
         message_lower = message.lower()
+        words = frozenset(_WORD_RE.findall(message_lower))
         
         # Basic product type detection
         product_type = None
-        if any(word in message_lower for word in ["hoodie", "sweatshirt"]):
+        if words & HOODIE_WORDS:
             product_type = "hoodie"
-        elif any(word in message_lower for word in ["shirt", "tee", "jersey"]):
+        elif words & SHIRT_WORDS:
             product_type = "shirt"
         
         # Basic color detection
@@ -260,6 +307,10 @@ class EnhancedOpenAIService:
     
     def get_logo_inspired_colors(self, logo_url: str) -> Dict:
         """Analyze logo colors for inspiration (enhanced version)"""
+        cache_key = self._cache_key("get_logo_inspired_colors", logo_url)
+        cached = self._get_cached_analysis(cache_key)
+        if cached is not None:
+            return cached
         
         system_prompt = """You are an expert in logo color analysis for sports merchandise. 
         Based on the logo provided, suggest primary and complementary colors that would work well 
@@ -298,8 +349,9 @@ class EnhancedOpenAIService:
                 max_tokens=400
             )
             
-            import json
-            return json.loads(response.choices[0].message.content)
+            result = orjson.loads(response.choices[0].message.content)
+            self._cache_analysis(cache_key, result)
+            return result
             
         except Exception as e:
             logger.error(f"Error analyzing logo colors: {e}")
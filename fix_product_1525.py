@@ -3,80 +3,108 @@
 Fix the swapped color/size fields in product 1525 (Midweight Softstyle Fleece Hoodie)
 """
 
-import json
 import logging
 
+import orjson
+
+from product_service import save_cache
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SIZES = {"S", "M", "L", "XL", "2XL", "3XL", "4XL", "5XL"}
+COLORS = {"Cocoa", "Paragon", "Pink Lemonade", "Charcoal", "Dark Heather", "Maroon", "Navy", "Pistachio"}
+
+# The mapping counts as correct when this share of the first SAMPLE_SIZE variants looks right
+SAMPLE_SIZE = 10
+CORRECT_RATIO = 0.8
+
+def _count_correct(variants, check_colors=False):
+    """Return (correct, sampled, passed) for the first SAMPLE_SIZE variants
+    
+    A variant is correct when its size field holds a size (and, with check_colors, its color field a known color).
+    """
+    sample = variants[:SAMPLE_SIZE]
+    correct = sum(
+        1 for variant in sample
+        if variant["size"] in SIZES and (not check_colors or variant["color"] in COLORS)
+    )
+    return correct, len(sample), bool(sample) and correct >= CORRECT_RATIO * len(sample)
+
+def _describe_variants(variants):
+    """One line per variant, joined so a whole sample is emitted as a single log record"""
+    return "\n".join(
+        f"  Variant {variant['id']}: color='{variant['color']}', size='{variant['size']}'"
+        for variant in variants
+    )
+
 def fix_product_1525():
-    """Fix the swapped color and size fields in product 1525"""
+    """Fix the swapped color and size fields in product 1525
+    
+    Returns (success, data) so the caller can verify without re-reading the file.
+    """
     
     cache_file = "top3_product_cache_optimized.json"
     
     # Load the cache
     try:
-        with open(cache_file, 'r') as f:
-            data = json.load(f)
+        with open(cache_file, 'rb') as f:
+            data = orjson.loads(f.read())
     except Exception as e:
         logger.error(f"Failed to load cache file: {e}")
-        return False
+        return False, None
     
     # Check if product 1525 exists
     if "1525" not in data.get("products", {}):
         logger.error("Product 1525 not found in cache")
-        return False
+        return False, None
     
     product = data["products"]["1525"]
     variants = product.get("variants", [])
     
     if not variants:
         logger.error("No variants found for product 1525")
-        return False
+        return False, None
     
     logger.info(f"Found {len(variants)} variants to fix in product 1525")
     
     # Show before/after for first few variants
-    logger.info("BEFORE (first 3 variants):")
-    for i, variant in enumerate(variants[:3]):
-        logger.info(f"  Variant {variant['id']}: color='{variant['color']}', size='{variant['size']}'")
+    logger.info("BEFORE (first 3 variants):\n" + _describe_variants(variants[:3]))
+    
+    # Running the fix twice would swap the fields back, so bail out if sizes are already in place
+    if _count_correct(variants)[2]:
+        logger.info("Product 1525 variants already have correct field mapping - nothing to do")
+        return True, data
     
     # Fix all variants by swapping color and size fields
-    fixed_count = 0
-    for variant in variants:
-        old_color = variant["color"]
-        old_size = variant["size"]
-        
-        # Swap the fields
-        variant["color"] = old_size
-        variant["size"] = old_color
-        fixed_count += 1
+    variants = product["variants"] = [
+        {**variant, "color": variant["size"], "size": variant["color"]}
+        for variant in variants
+    ]
     
-    logger.info(f"Fixed {fixed_count} variants")
-    logger.info("AFTER (first 3 variants):")
-    for i, variant in enumerate(variants[:3]):
-        logger.info(f"  Variant {variant['id']}: color='{variant['color']}', size='{variant['size']}'")
+    logger.info(f"Fixed {len(variants)} variants")
+    logger.info("AFTER (first 3 variants):\n" + _describe_variants(variants[:3]))
     
     # Save the corrected cache
     try:
-        with open(cache_file, 'w') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        save_cache(cache_file, data)
         logger.info(f"Successfully saved corrected cache to {cache_file}")
-        return True
+        return True, data
     except Exception as e:
         logger.error(f"Failed to save corrected cache: {e}")
-        return False
+        return False, None
 
-def verify_fix():
-    """Verify that the fix worked"""
+def verify_fix(data=None):
+    """Verify that the fix worked, reading the cache from disk only if no data is given"""
     cache_file = "top3_product_cache_optimized.json"
     
-    try:
-        with open(cache_file, 'r') as f:
-            data = json.load(f)
-    except Exception as e:
-        logger.error(f"Failed to load cache file for verification: {e}")
-        return False
+    if data is None:
+        try:
+            with open(cache_file, 'rb') as f:
+                data = orjson.loads(f.read())
+        except Exception as e:
+            logger.error(f"Failed to load cache file for verification: {e}")
+            return False
     
     product = data.get("products", {}).get("1525", {})
     variants = product.get("variants", [])
@@ -85,26 +113,21 @@ def verify_fix():
         logger.error("No variants found during verification")
         return False
     
-    # Check first few variants to ensure fields are correct
-    sizes = {"S", "M", "L", "XL", "2XL", "3XL", "4XL", "5XL"}
-    colors = {"Cocoa", "Paragon", "Pink Lemonade", "Charcoal", "Dark Heather", "Maroon", "Navy", "Pistachio"}
-    
-    correct_variants = 0
-    for variant in variants[:10]:  # Check first 10
-        if variant["size"] in sizes and variant["color"] in colors:
-            correct_variants += 1
+    # Check first few variants to ensure fields are correct, allowing some margin
+    correct_variants, sampled, passed = _count_correct(variants, check_colors=True)
     
-    logger.info(f"Verification: {correct_variants}/10 variants have correct field mapping")
-    return correct_variants >= 8  # Allow some margin
+    logger.info(f"Verification: {correct_variants}/{sampled} variants have correct field mapping")
+    return passed
 
 if __name__ == "__main__":
     logger.info("🔧 FIXING PRODUCT 1525 COLOR/SIZE FIELD SWAPPING")
     logger.info("=" * 60)
     
-    if fix_product_1525():
+    ok, data = fix_product_1525()
+    if ok:
         logger.info("✅ Fix applied successfully")
         
-        if verify_fix():
+        if verify_fix(data):
             logger.info("✅ Verification passed - fields are now correct")
             logger.info("🎉 Product 1525 fix completed successfully!")
         else:
@@ -7,10 +7,22 @@ Order ID: c184bceb-859c-42a4-9818-d29eb85f3807
 import requests
 import json
 import os
+import time
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Shared session so the status check reuses the fulfillment call's TLS connection.
+# Retry only covers idempotent methods (urllib3's default), never the fulfillment POST.
+SESSION = requests.Session()
+SESSION.headers.update({
+    "Content-Type": "application/json",
+    "User-Agent": "MiM-Fulfillment-Test/1.0"
+})
+SESSION.mount("https://", HTTPAdapter(max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504])))
+
 def get_order_from_supabase():
     """Get order details from Supabase"""
     
@@ -52,12 +64,8 @@ def fulfill_via_storefront():
     print(f"📦 Order ID: {order_id}")
     
     try:
-        response = requests.post(
+        response = SESSION.post(
             f"{storefront_url}/api/fulfill-order",
-            headers={
-                "Content-Type": "application/json",
-                "User-Agent": "MiM-Fulfillment-Test/1.0"
-            },
             json={"order_id": order_id},
             timeout=60
         )
@@ -117,7 +125,7 @@ def check_order_status():
     print(f"\n📊 Checking order status...")
     
     try:
-        response = requests.get(
+        response = SESSION.get(
             f"{storefront_url}/api/check-order-status/{order_id}",
             timeout=30
         )
@@ -156,7 +164,6 @@ if __name__ == "__main__":
         
         print("\n" + "=" * 55)
         print("⏱️  Waiting 5 seconds before checking status...")
-        import time
         time.sleep(5)
         
         # Step 3: Check status
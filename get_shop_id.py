@@ -4,25 +4,15 @@ Get Printify Shop ID and test mockup creation
 """
 
 import os
-import json
-import requests
+import asyncio
+import httpx
 from product_service import ProductService
 from printify_service import PrintifyService
 
-def get_printify_shop_id():
-    """Get the shop ID from Printify API"""
-    api_token = os.getenv('PRINTIFY_API_TOKEN')
-    if not api_token:
-        print("❌ PRINTIFY_API_TOKEN not found in environment")
-        return None
-    
-    headers = {
-        "Authorization": f"Bearer {api_token}",
-        "Content-Type": "application/json"
-    }
-    
+async def fetch_shops(client):
+    """List the shops on the Printify account"""
     try:
-        response = requests.get("https://api.printify.com/v1/shops.json", headers=headers)
+        response = await client.get("https://api.printify.com/v1/shops.json")
         if response.status_code == 200:
             shops = response.json()
             print(f"🏪 Found {len(shops)} shop(s):")
@@ -39,7 +29,44 @@ def get_printify_shop_id():
         print(f"❌ Error getting shop ID: {e}")
         return None
 
-def test_mockup_with_shop_id(shop_id):
+def _printify_client():
+    """Async client authenticated against the Printify API, or None without a token"""
+    api_token = os.getenv('PRINTIFY_API_TOKEN')
+    if not api_token:
+        print("❌ PRINTIFY_API_TOKEN not found in environment")
+        return None
+    
+    headers = {
+        "Authorization": f"Bearer {api_token}",
+        "Content-Type": "application/json"
+    }
+    return httpx.AsyncClient(headers=headers, timeout=httpx.Timeout(10.0))
+
+async def fetch_shop_id():
+    """Fetch just the shop ID"""
+    client = _printify_client()
+    if client is None:
+        return None
+    async with client:
+        return await fetch_shops(client)
+
+async def get_shop_id_and_products():
+    """Fetch the shop ID while the product cache loads in a worker thread"""
+    client = _printify_client()
+    if client is None:
+        return None, None
+    
+    async with client:
+        return await asyncio.gather(
+            fetch_shops(client),
+            asyncio.to_thread(ProductService)
+        )
+
+def get_printify_shop_id():
+    """Get the shop ID from Printify API"""
+    return asyncio.run(fetch_shop_id())
+
+def test_mockup_with_shop_id(shop_id, product_service=None):
     """Test mockup creation with the shop ID"""
     print(f"\n🧪 Testing mockup creation with Shop ID: {shop_id}")
     
@@ -47,7 +74,7 @@ def test_mockup_with_shop_id(shop_id):
     os.environ['PRINTIFY_SHOP_ID'] = str(shop_id)
     
     # Create services
-    product_service = ProductService()
+    product_service = product_service or ProductService()
     printify_service = PrintifyService()
     
     # Test with Jersey Tee
@@ -102,14 +129,14 @@ def main():
     print("🔍 GETTING PRINTIFY SHOP ID AND TESTING MOCKUP CREATION")
     print("=" * 60)
     
-    # Get shop ID
-    shop_id = get_printify_shop_id()
+    # Get shop ID (product cache loads concurrently)
+    shop_id, product_service = asyncio.run(get_shop_id_and_products())
     if not shop_id:
         print("❌ Could not get shop ID")
         return
     
     # Test mockup creation
-    success = test_mockup_with_shop_id(shop_id)
+    success = test_mockup_with_shop_id(shop_id, product_service)
     
     print("\n" + "=" * 60)
     if success:
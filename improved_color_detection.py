@@ -8,8 +8,17 @@ in the validation testing.
 """
 
 import re
+import bisect
+from collections import OrderedDict
+from functools import lru_cache
 from typing import Dict, List, Tuple, Optional, Set
 
+# Number of products whose lowercased variant titles are kept
+TITLE_CACHE_SIZE = 32
+
+# Number of distinct (lowercased) messages whose color extraction is memoized
+EXTRACT_CACHE_SIZE = 2048
+
 class ImprovedColorDetector:
     def __init__(self):
         self.color_families = {
@@ -26,34 +35,73 @@ class ImprovedColorDetector:
             "brown": ["brown", "tan", "khaki", "beige", "chocolate"]
         }
         
+        # Single alternation over every color, longest first so "royal blue" wins over "blue"
+        self._color_to_family = {
+            color: family
+            for family, colors in self.color_families.items()
+            for color in colors
+        }
+        self._mega = re.compile(
+            r'\b(' + '|'.join(sorted(map(re.escape, self._color_to_family), key=len, reverse=True)) + r')\b'
+        )
+        
+        # id(variants) -> (variants, lowercased titles, color tokens per title); the list is kept to detect id reuse
+        self._title_cache: "OrderedDict[int, Tuple[List[Dict], List[str], List[Tuple[str, ...]]]]" = OrderedDict()
+        
         # Common color phrases and their priorities
         self.color_priority_phrases = [
             "mainly", "primarily", "mostly", "predominately", 
             "prefer", "want", "looking for", "in"
         ]
+        self._priority_re = re.compile(
+            r'\b(' + '|'.join(map(re.escape, self.color_priority_phrases)) + r')\b'
+        )
+        
+        # Extraction is pure, so memoize it per instance on the lowercased text
+        self._extract_cached = lru_cache(maxsize=EXTRACT_CACHE_SIZE)(self._extract_impl)
+    
+    def clear_cache(self):
+        """
+        Drop memoized color extractions and lowercased variant titles
+        """
+        self._extract_cached.cache_clear()
+        self._title_cache.clear()
     
     def extract_colors_advanced(self, text: str) -> Dict:
         """
         Advanced color extraction that handles multiple colors and context
         """
-        text_lower = text.lower()
-        
+        # Cached entries are immutable tuples; rebuild fresh lists for the caller
+        return {
+            key: list(value) if isinstance(value, tuple) else value
+            for key, value in self._extract_cached(text.lower())
+        }
+    
+    def _extract_impl(self, text_lower: str) -> Tuple:
+        """
+        Uncached extraction, returned as a hashable tuple of (key, value) pairs
+        """
+        result = self._extract_dict(text_lower)
+        return tuple(
+            (key, tuple(value) if isinstance(value, list) else value)
+            for key, value in result.items()
+        )
+    
+    def _extract_dict(self, text_lower: str) -> Dict:
+        """
+        Color extraction on already-lowercased text
+        """
         # Find all color mentions with their positions
-        color_matches = []
-        for family, colors in self.color_families.items():
-            for color in colors:
-                pattern = r'\b' + re.escape(color) + r'\b'
-                matches = list(re.finditer(pattern, text_lower))
-                for match in matches:
-                    color_matches.append({
-                        'color': color,
-                        'family': family,
-                        'position': match.start(),
-                        'end': match.end()
-                    })
-        
-        # Sort by position to maintain order
-        color_matches.sort(key=lambda x: x['position'])
+        # (one scan, already in position order)
+        color_matches = [
+            {
+                'color': match.group(1),
+                'family': self._color_to_family[match.group(1)],
+                'position': match.start(),
+                'end': match.end()
+            }
+            for match in self._mega.finditer(text_lower)
+        ]
         
         if not color_matches:
             return {
@@ -92,30 +140,20 @@ class ImprovedColorDetector:
         if len(color_matches) == 1:
             return color_matches[0]
         
-        # Check for priority phrases that indicate primary color
-        for phrase in self.color_priority_phrases:
-            phrase_pos = text.find(phrase)
-            if phrase_pos != -1:
-                # Find the closest color after the priority phrase
-                closest_color = None
-                min_distance = float('inf')
-                
-                for color_match in color_matches:
-                    if color_match['position'] > phrase_pos:
-                        distance = color_match['position'] - phrase_pos
-                        if distance < min_distance:
-                            min_distance = distance
-                            closest_color = color_match
-                
-                if closest_color:
-                    return closest_color
+        # First position of each priority phrase, found in a single scan
+        phrase_positions = {}
+        for match in self._priority_re.finditer(text):
+            phrase_positions.setdefault(match.group(1), match.start())
         
-        # Special handling for common patterns
-        if "and" in text:
-            # For "X and Y", prioritize the first color mentioned
-            return color_matches[0]
+        # Closest color after the highest-priority phrase (matches are sorted by position)
+        positions = [m['position'] for m in color_matches]
+        for phrase in self.color_priority_phrases:
+            if phrase in phrase_positions:
+                i = bisect.bisect_right(positions, phrase_positions[phrase])
+                if i < len(color_matches):
+                    return color_matches[i]
         
-        # Default to first mentioned color
+        # Default to first mentioned color (this also covers "X and Y")
         return color_matches[0]
     
     def _calculate_color_confidence(self, text: str, color_matches: List[Dict]) -> float:
@@ -156,6 +194,23 @@ class ImprovedColorDetector:
         else:
             return "no_colors"
     
+    def _variant_index(self, variants: List[Dict]) -> Tuple[List[str], List[Tuple[str, ...]]]:
+        """
+        Lowercased variant titles and the colors found in each, computed once per variants list
+        """
+        key = id(variants)
+        cached = self._title_cache.get(key)
+        if cached is not None and cached[0] is variants and len(cached[1]) == len(variants):
+            self._title_cache.move_to_end(key)
+            return cached[1], cached[2]
+        
+        titles = [variant.get('title', '').lower() for variant in variants]
+        tokens = [tuple(match.group(1) for match in self._mega.finditer(title)) for title in titles]
+        self._title_cache[key] = (variants, titles, tokens)
+        if len(self._title_cache) > TITLE_CACHE_SIZE:
+            self._title_cache.popitem(last=False)
+        return titles, tokens
+    
     def validate_color_availability_improved(self, product_data: Dict, color: str) -> Dict:
         """
         Improved color availability validation with better variant parsing
@@ -172,13 +227,13 @@ class ImprovedColorDetector:
         matching_variants = []
         
         # Enhanced color matching in variant titles
+        color_lower = color.lower()
         color_family = self._get_color_family(color)
+        titles, tokens = self._variant_index(variants)
         
-        for variant in variants:
-            variant_title = variant.get('title', '').lower()
-            
+        for variant, variant_title, variant_colors in zip(variants, titles, tokens):
             # Direct color match
-            if color.lower() in variant_title:
+            if color_lower in variant_title:
                 matching_variants.append({
                     'id': variant.get('id'),
                     'title': variant.get('title'),
@@ -188,16 +243,14 @@ class ImprovedColorDetector:
             
             # Family match (e.g., "maroon" matches "red" family)
             if color_family:
-                family_colors = self.color_families[color_family]
-                for family_color in family_colors:
-                    if family_color in variant_title:
-                        matching_variants.append({
-                            'id': variant.get('id'),
-                            'title': variant.get('title'),
-                            'match_type': 'family',
-                            'matched_color': family_color
-                        })
-                        break
+                family_match = next((c for c in variant_colors if self._color_to_family[c] == color_family), None)
+                if family_match:
+                    matching_variants.append({
+                        'id': variant.get('id'),
+                        'title': variant.get('title'),
+                        'match_type': 'family',
+                        'matched_color': family_match
+                    })
         
         # Calculate availability confidence
         total_variants = len(variants)
@@ -226,11 +279,7 @@ class ImprovedColorDetector:
         """
         Get the color family for a given color
         """
-        color_lower = color.lower()
-        for family, colors in self.color_families.items():
-            if color_lower in colors:
-                return family
-        return None
+        return self._color_to_family.get(color.lower())
     
     def suggest_alternative_colors(self, product_data: Dict, requested_color: str) -> List[Dict]:
         """
@@ -241,23 +290,17 @@ class ImprovedColorDetector:
         
         # Extract all available colors from variants
         available_colors = set()
-        variants = product_data['variants']
+        _, tokens = self._variant_index(product_data['variants'])
         
-        for variant in variants:
-            variant_title = variant.get('title', '').lower()
-            
-            # Extract color words from variant titles
-            for family, colors in self.color_families.items():
-                for color in colors:
-                    if color in variant_title:
-                        available_colors.add(color)
+        for variant_colors in tokens:
+            available_colors.update(variant_colors)
         
         # Suggest colors from same family first
         requested_family = self._get_color_family(requested_color)
         suggestions = []
         
         if requested_family:
-            family_colors = [c for c in available_colors if self._get_color_family(c) == requested_family]
+            family_colors = [c for c in available_colors if self._color_to_family[c] == requested_family]
             suggestions.extend([{'color': c, 'reason': 'same_family'} for c in family_colors])
         
         # Add popular colors
@@ -4,12 +4,40 @@ Investigate why Printify mockups aren't showing different colors
 """
 
 import os
+import json
 import requests
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# Pooled session so every product fetch after the first reuses the TLS connection
+session = requests.Session()
+session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=10,
+                                      max_retries=Retry(total=2, backoff_factor=0.3)))
+
+# Product bodies with their ETags so repeat runs can revalidate instead of re-downloading
+PRODUCT_CACHE_DIR = Path.home() / ".cache" / "printify"
+
+def _load_cached(product_id):
+    """Return (etag, body) for a previously fetched product, or (None, None)"""
+    try:
+        cached = json.loads((PRODUCT_CACHE_DIR / f"{product_id}.json").read_text())
+        return cached.get("etag"), cached.get("body")
+    except (OSError, ValueError):
+        return None, None
+
+def _store_cached(product_id, etag, body):
+    try:
+        PRODUCT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        (PRODUCT_CACHE_DIR / f"{product_id}.json").write_text(json.dumps({"etag": etag, "body": body}))
+    except OSError:
+        pass
+
 def investigate_product_mockups():
     """Investigate the actual Printify product structure"""
     print("🔍 INVESTIGATING PRINTIFY PRODUCT MOCKUP GENERATION")
@@ -22,10 +50,10 @@ def investigate_product_mockups():
         print("❌ PRINTIFY_API_TOKEN not found")
         return
     
-    headers = {
+    session.headers.update({
         "Authorization": f"Bearer {api_token}",
         "Content-Type": "application/json"
-    }
+    })
     
     # Test with the actual products from drop_data.json
     test_products = [
@@ -34,77 +62,114 @@ def investigate_product_mockups():
         "68641c1fd9fa9f6f180d7b7b"   # From drop_data.json
     ]
     
-    for i, product_id in enumerate(test_products, 1):
-        print(f"\n📦 Product {i}: {product_id}")
-        print("-" * 50)
-        
+    def fetch(product_id):
+        etag, body = _load_cached(product_id)
         try:
-            response = requests.get(
+            response = session.get(
                 f"https://api.printify.com/v1/shops/{shop_id}/products/{product_id}.json",
-                headers=headers
+                headers={"If-None-Match": etag} if etag and body is not None else None,
+                timeout=10
             )
-            
-            if response.status_code == 200:
-                product_data = response.json()
-                
-                print(f"   Title: {product_data.get('title')}")
-                print(f"   Status: {product_data.get('status')}")
-                print(f"   Total variants: {len(product_data.get('variants', []))}")
-                
-                # Check images
-                images = product_data.get('images', [])
-                print(f"   Total images: {len(images)}")
-                
-                if images:
-                    print(f"   📸 Image breakdown:")
-                    for j, image in enumerate(images[:10]):  # Show first 10
-                        variant_ids = image.get('variant_ids', [])
-                        position = image.get('position', 'unknown')
-                        is_default = image.get('is_default', False)
-                        src = image.get('src', '')
-                        
-                        print(f"      {j+1}. Position: {position}, Default: {is_default}")
-                        print(f"         Variants: {len(variant_ids)} ({variant_ids[:3]}{'...' if len(variant_ids) > 3 else ''})")
-                        print(f"         URL: {src[-50:]}...")  # Last 50 chars
-                
-                # Check specific variants we're interested in
-                test_variants = [18486, 18395, 12100]  # From the URLs
-                print(f"\n   🎯 Testing specific variants:")
-                
-                for variant_id in test_variants:
-                    # Look for images with this specific variant
-                    variant_images = [img for img in images if variant_id in img.get('variant_ids', [])]
-                    if variant_images:
-                        print(f"      Variant {variant_id}: {len(variant_images)} image(s)")
-                        for img in variant_images:
-                            print(f"         → {img.get('position')} ({img.get('src', '')[-40:]}...)")
-                    else:
-                        print(f"      Variant {variant_id}: ❌ No specific image found")
-                
-                # Check if all images are the same
-                unique_image_urls = set(img.get('src') for img in images)
-                print(f"\n   🔍 Image URL analysis:")
-                print(f"      Total images: {len(images)}")
-                print(f"      Unique URLs: {len(unique_image_urls)}")
-                
-                if len(unique_image_urls) == 1:
-                    print(f"      ⚠️ ALL IMAGES USE THE SAME URL!")
-                    print(f"      This explains why colors look identical")
-                elif len(unique_image_urls) < len(images):
-                    print(f"      ⚠️ Some images share URLs ({len(images) - len(unique_image_urls)} duplicates)")
-                else:
-                    print(f"      ✅ All images have unique URLs")
-                    
-            else:
-                print(f"   ❌ Failed to get product: {response.status_code} - {response.text}")
-                
         except Exception as e:
-            print(f"   ❌ Error: {e}")
+            return e
+        
+        if response.status_code == 304:
+            return body
+        if response.status_code == 200:
+            try:
+                product_data = response.json()
+            except Exception as e:
+                return e
+            if response.headers.get("ETag"):
+                _store_cached(product_id, response.headers["ETag"], product_data)
+            return product_data
+        return response
+    
+    # Fetch all products concurrently over the pooled session, then report in order
+    with ThreadPoolExecutor(max_workers=min(8, len(test_products))) as executor:
+        responses = list(executor.map(fetch, test_products))
+    
+    for i, (product_id, response) in enumerate(zip(test_products, responses), 1):
+        _report_product(i, product_id, response)
     
     print(f"\n🎯 CONCLUSION:")
     print("If all products show 'ALL IMAGES USE THE SAME URL', then Printify")
     print("is not generating variant-specific mockups, which explains why")
     print("all colors look the same despite different variant IDs in URLs.")
 
+def _report_product(i, product_id, response):
+    """Print the mockup image breakdown for one fetched product"""
+    print(f"\n📦 Product {i}: {product_id}")
+    print("-" * 50)
+    
+    try:
+        if isinstance(response, Exception):
+            raise response
+        
+        # Fetched products arrive already parsed (fresh or from the ETag cache); anything else failed
+        if isinstance(response, dict):
+            product_data = response
+            
+            print(f"   Title: {product_data.get('title')}")
+            print(f"   Status: {product_data.get('status')}")
+            print(f"   Total variants: {len(product_data.get('variants', []))}")
+            
+            # Check images
+            images = product_data.get('images', [])
+            print(f"   Total images: {len(images)}")
+            
+            # Index images by variant and collect distinct URLs in a single pass
+            images_by_variant = {}
+            unique_image_urls = set()
+            for img in images:
+                unique_image_urls.add(img.get('src'))
+                for vid in set(img.get('variant_ids') or ()):
+                    images_by_variant.setdefault(vid, []).append(img)
+            
+            if images:
+                print(f"   📸 Image breakdown:")
+                for j, image in enumerate(images[:10]):  # Show first 10
+                    variant_ids = image.get('variant_ids', [])
+                    position = image.get('position', 'unknown')
+                    is_default = image.get('is_default', False)
+                    src = image.get('src', '')
+                    
+                    print(f"      {j+1}. Position: {position}, Default: {is_default}")
+                    print(f"         Variants: {len(variant_ids)} ({variant_ids[:3]}{'...' if len(variant_ids) > 3 else ''})")
+                    print(f"         URL: {src[-50:]}...")  # Last 50 chars
+            
+            # Check specific variants we're interested in
+            test_variants = [18486, 18395, 12100]  # From the URLs
+            print(f"\n   🎯 Testing specific variants:")
+            
+            for variant_id in test_variants:
+                # Look for images with this specific variant
+                variant_images = images_by_variant.get(variant_id, [])
+                if variant_images:
+                    print(f"      Variant {variant_id}: {len(variant_images)} image(s)")
+                    for img in variant_images:
+                        print(f"         → {img.get('position')} ({img.get('src', '')[-40:]}...)")
+                else:
+                    print(f"      Variant {variant_id}: ❌ No specific image found")
+            
+            # Check if all images are the same
+            print(f"\n   🔍 Image URL analysis:")
+            print(f"      Total images: {len(images)}")
+            print(f"      Unique URLs: {len(unique_image_urls)}")
+            
+            if len(unique_image_urls) == 1:
+                print(f"      ⚠️ ALL IMAGES USE THE SAME URL!")
+                print(f"      This explains why colors look identical")
+            elif len(unique_image_urls) < len(images):
+                print(f"      ⚠️ Some images share URLs ({len(images) - len(unique_image_urls)} duplicates)")
+            else:
+                print(f"      ✅ All images have unique URLs")
+                
+        else:
+            print(f"   ❌ Failed to get product: {response.status_code} - {response.text}")
+            
+    except Exception as e:
+        print(f"   ❌ Error: {e}")
+
 if __name__ == "__main__":
     investigate_product_mockups()
\ No newline at end of file
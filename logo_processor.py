@@ -1,18 +1,83 @@
+import io
 import os
+import time
+import secrets
+import struct
+import itertools
 import requests
 import logging
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from PIL import Image
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple, Union, BinaryIO
 import tempfile
 from urllib.parse import urlparse
 
 logger = logging.getLogger(__name__)
 
+# Refuse to open decompression bombs; valid logos are capped at 5000x5000 anyway
+Image.MAX_IMAGE_PIXELS = 25_000_000
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# JPEG start-of-frame markers carrying the image dimensions (excludes DHT, JPG and DAC)
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def _probe_image_header(fh: BinaryIO) -> Optional[Tuple[str, Tuple[int, int]]]:
+    """Read format and dimensions of a PNG or JPEG from its header bytes only.
+
+    Returns None for other formats or unexpected layouts so the caller can fall back to PIL.
+    """
+    fh.seek(0)
+    head = fh.read(24)
+    if len(head) == 24 and head.startswith(PNG_SIGNATURE) and head[12:16] == b'IHDR':
+        width, height = struct.unpack('>II', head[16:24])
+        return 'png', (width, height)
+    
+    if not head.startswith(b'\xff\xd8'):
+        return None
+    
+    # Walk the JPEG segments until the first start-of-frame
+    fh.seek(2)
+    while True:
+        marker = fh.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        if marker[1] == 0xFF:
+            # Fill byte before the marker code
+            fh.seek(-1, 1)
+            continue
+        length_bytes = fh.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack('>H', length_bytes)[0]
+        if length < 2:
+            # The length counts its own two bytes; anything smaller would walk backwards forever
+            return None
+        if marker[1] in JPEG_SOF_MARKERS:
+            frame = fh.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack('>HH', frame[1:5])
+            return 'jpeg', (width, height)
+        fh.seek(length - 2, 1)
+
 class LogoProcessor:
     def __init__(self):
-        self.supported_formats = ['png', 'jpg', 'jpeg', 'svg']
+        # Must match what _validate_image_file accepts, so unusable files are refused before download
+        self.supported_formats = frozenset({'png', 'jpg', 'jpeg'})
+        self._allowed_mimes = frozenset({'image/png', 'image/jpeg', 'image/jpg'})
         self.max_file_size = 10 * 1024 * 1024  # 10MB
         self.temp_dir = tempfile.gettempdir()
+        self._epoch_prefix = int(time.time())
+        self._temp_counter = itertools.count(1)
+        
+        # Pooled session so repeated logo downloads from Slack/CDN hosts reuse connections
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20,
+                              max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504]))
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
     
     def download_logo_from_url(self, url: str) -> Dict:
         """Download logo from URL and validate"""
@@ -24,33 +89,36 @@ class LogoProcessor:
             headers = {
                 'User-Agent': 'MiM Youth Sports Bot/1.0 (https://github.com/nathan-eagle/mim-youth-sports-slack-bot)'
             }
-            response = requests.get(url, headers=headers, timeout=10, stream=True)
+            response = self._session.get(url, headers=headers, timeout=10, stream=True)
             response.raise_for_status()
             
             # Check content type
-            content_type = response.headers.get('content-type', '').lower()
-            if not any(fmt in content_type for fmt in ['image/png', 'image/jpeg', 'image/jpg', 'image/svg']):
+            content_type = response.headers.get('content-type', '').split(';', 1)[0].strip().lower()
+            if content_type not in self._allowed_mimes:
+                response.close()
                 return {"success": False, "error": "URL does not point to a supported image format"}
             
             # Check file size
             content_length = response.headers.get('content-length')
             if content_length and int(content_length) > self.max_file_size:
+                response.close()
                 return {"success": False, "error": "Image file is too large (max 10MB)"}
             
-            # Save to temporary file
-            temp_filename = self._generate_temp_filename(url)
-            temp_path = os.path.join(self.temp_dir, temp_filename)
-            
-            with open(temp_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+            # Download into memory and validate there, so rejected images never touch disk
+            buffer = self._read_capped(response)
+            if buffer is None:
+                return {"success": False, "error": "Image file is too large (max 10MB)"}
             
-            # Validate downloaded image
-            validation_result = self._validate_image_file(temp_path)
+            validation_result = self._validate_image_file(buffer)
             if not validation_result["success"]:
-                self._cleanup_temp_file(temp_path)
                 return validation_result
             
+            # Callers expect a file path, so persist the validated bytes with a single write
+            temp_filename = self._generate_temp_filename(url)
+            temp_path = os.path.join(self.temp_dir, temp_filename)
+            with open(temp_path, 'wb') as f:
+                f.write(buffer.getbuffer())
+            
             logger.info(f"Successfully downloaded logo from URL: {url}")
             return {
                 "success": True,
@@ -84,10 +152,11 @@ class LogoProcessor:
                 return {"success": False, "error": "Failed to access uploaded file"}
             
             # Download file content
-            file_response = requests.get(
+            file_response = self._session.get(
                 file_url,
                 headers={'Authorization': f'Bearer {slack_client.token}'},
-                timeout=10
+                timeout=10,
+                stream=True
             )
             file_response.raise_for_status()
             
@@ -95,8 +164,8 @@ class LogoProcessor:
             temp_filename = self._generate_temp_filename(file_name)
             temp_path = os.path.join(self.temp_dir, temp_filename)
             
-            with open(temp_path, 'wb') as f:
-                f.write(file_response.content)
+            if not self._stream_to_file(file_response, temp_path):
+                return {"success": False, "error": "File is too large (max 10MB)"}
             
             # Validate image
             validation_result = self._validate_image_file(temp_path)
@@ -117,28 +186,65 @@ class LogoProcessor:
             logger.error(f"Error processing Slack file: {e}")
             return {"success": False, "error": "Failed to process uploaded file"}
     
-    def _validate_image_file(self, file_path: str) -> Dict:
-        """Validate image file format and properties"""
+    def _read_capped(self, response) -> Optional[io.BytesIO]:
+        """Read a response body into memory, returning None once it exceeds max_file_size"""
+        buffer = io.BytesIO()
+        for chunk in response.iter_content(chunk_size=8192):
+            if buffer.tell() + len(chunk) > self.max_file_size:
+                response.close()
+                return None
+            buffer.write(chunk)
+        return buffer
+    
+    def _stream_to_file(self, response, temp_path: str) -> bool:
+        """Stream a response body to disk, aborting once it exceeds max_file_size"""
+        # Content-Length may be missing or wrong, so enforce the cap on the bytes actually received
+        written = 0
+        with open(temp_path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=8192):
+                written += len(chunk)
+                if written > self.max_file_size:
+                    break
+                f.write(chunk)
+        
+        if written > self.max_file_size:
+            response.close()
+            self._cleanup_temp_file(temp_path)
+            return False
+        return True
+    
+    def _validate_image_file(self, source: Union[str, BinaryIO]) -> Dict:
+        """Validate image file format and properties, given a path or an in-memory buffer"""
         try:
-            with Image.open(file_path) as img:
-                format_lower = img.format.lower() if img.format else 'unknown'
-                
-                if format_lower not in ['png', 'jpeg', 'jpg']:
-                    return {"success": False, "error": f"Unsupported image format: {format_lower}"}
-                
-                # Check image dimensions (reasonable limits)
-                width, height = img.size
-                if width < 50 or height < 50:
-                    return {"success": False, "error": "Image is too small (minimum 50x50 pixels)"}
-                
-                if width > 5000 or height > 5000:
-                    return {"success": False, "error": "Image is too large (maximum 5000x5000 pixels)"}
-                
-                return {
-                    "success": True,
-                    "format": format_lower,
-                    "size": (width, height)
-                }
+            if isinstance(source, str):
+                with open(source, 'rb') as fh:
+                    probed = _probe_image_header(fh)
+            else:
+                probed = _probe_image_header(source)
+                source.seek(0)
+            
+            if probed:
+                format_lower, (width, height) = probed
+            else:
+                with Image.open(source) as img:
+                    format_lower = img.format.lower() if img.format else 'unknown'
+                    width, height = img.size
+            
+            if format_lower not in ['png', 'jpeg', 'jpg']:
+                return {"success": False, "error": f"Unsupported image format: {format_lower}"}
+            
+            # Check image dimensions (reasonable limits)
+            if width < 50 or height < 50:
+                return {"success": False, "error": "Image is too small (minimum 50x50 pixels)"}
+            
+            if width > 5000 or height > 5000:
+                return {"success": False, "error": "Image is too large (maximum 5000x5000 pixels)"}
+            
+            return {
+                "success": True,
+                "format": format_lower,
+                "size": (width, height)
+            }
                 
         except Exception as e:
             logger.error(f"Error validating image: {e}")
@@ -154,16 +260,16 @@ class LogoProcessor:
     
     def _generate_temp_filename(self, original: str) -> str:
         """Generate temporary filename"""
-        import uuid
-        import time
+        # Per-process counter keeps names unique; the random suffix separates processes started together
+        prefix = f"logo_{self._epoch_prefix}_{next(self._temp_counter)}_{secrets.token_hex(2)}"
         
         # Extract extension if available
         if '.' in original:
             ext = original.split('.')[-1].lower()
             if ext in self.supported_formats:
-                return f"logo_{int(time.time())}_{uuid.uuid4().hex[:8]}.{ext}"
+                return f"{prefix}.{ext}"
         
-        return f"logo_{int(time.time())}_{uuid.uuid4().hex[:8]}.png"
+        return f"{prefix}.png"
     
     def _cleanup_temp_file(self, file_path: str):
         """Clean up temporary file"""
@@ -1,102 +1,201 @@
 import httpx
 import json
+import time
+import hashlib
 import logging
-from typing import Dict, Any, Optional
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Dict, Any, Optional, Callable, Hashable
 
 logger = logging.getLogger(__name__)
 
+# Response cache sizing and lifetimes (seconds)
+RESPONSE_CACHE_SIZE = 1024
+LOGO_CACHE_TTL = 3600
+PRODUCT_CACHE_TTL = 1800
+
+# Seconds a caller waits on another thread's identical in-flight request
+INFLIGHT_WAIT_TIMEOUT = 60
+
+# Last successful responses kept to serve while the MCP server is unreachable
+LAST_GOOD_CACHE_SIZE = 512
+
 class MCPClient:
     def __init__(self, base_url: str = "http://mim-mcp-alb-1505151310.us-east-1.elb.amazonaws.com"):
         self.base_url = base_url
-        self.client = httpx.Client(timeout=30.0)
+        # Keep connections to the MCP server alive between Slack events instead of reconnecting per call,
+        # and retry failed connection attempts before surfacing an error
+        self.client = httpx.Client(
+            base_url=self.base_url,
+            timeout=30.0,
+            transport=httpx.HTTPTransport(
+                retries=3,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+            )
+        )
     
-    def analyze_logo(self, logo_url: str) -> Dict[str, Any]:
-        """Analyze a logo using OpenAI Vision API"""
+        # key -> (stored_at, response); least recently used first
+        self._logo_cache: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._product_cache: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._cache_lock = threading.RLock()
+        self._refreshing = set()
+        # (cache, key) -> Future for misses currently being fetched, so concurrent callers share one request
+        self._inflight: Dict[tuple, Future] = {}
+        # endpoint:payload-hash -> (stored_at, response)
+        self._last_good: "OrderedDict[str, tuple]" = OrderedDict()
+    
+    def _cached_call(self, cache: OrderedDict, key: Hashable, ttl: float,
+                     fetch: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Serve a cached MCP response, refreshing it in the background once past half its TTL"""
+        now = time.monotonic()
+        with self._cache_lock:
+            entry = cache.get(key)
+            if entry is not None and now - entry[0] < ttl:
+                cache.move_to_end(key)
+                if now - entry[0] >= ttl / 2 and (id(cache), key) not in self._refreshing:
+                    self._refreshing.add((id(cache), key))
+                    threading.Thread(
+                        target=self._refresh_entry, args=(cache, key, fetch), daemon=True
+                    ).start()
+                return entry[1]
+            
+            flight_key = (id(cache), key)
+            future = self._inflight.get(flight_key)
+            leader = future is None
+            if leader:
+                future = self._inflight[flight_key] = Future()
+        
+        if not leader:
+            try:
+                return future.result(timeout=INFLIGHT_WAIT_TIMEOUT)
+            except FutureTimeoutError:
+                logger.error(f"Timed out waiting for an in-flight MCP request after {INFLIGHT_WAIT_TIMEOUT}s")
+                return {"error": "Timed out waiting for MCP server response"}
+        
         try:
-            response = self.client.post(
-                f"{self.base_url}/analyze_logo",
-                json={"logo_url": logo_url}
-            )
+            result = fetch()
+            self._store(cache, key, result)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._cache_lock:
+                self._inflight.pop(flight_key, None)
+    
+    def _refresh_entry(self, cache: OrderedDict, key: Hashable, fetch: Callable[[], Dict[str, Any]]):
+        try:
+            self._store(cache, key, fetch())
+        finally:
+            with self._cache_lock:
+                self._refreshing.discard((id(cache), key))
+    
+    def _store(self, cache: OrderedDict, key: Hashable, result: Dict[str, Any]):
+        # Errors, stale fallbacks and non-object bodies (e.g. null) are never cached so the next call retries the server
+        if not isinstance(result, dict) or "error" in result or result.get("stale"):
+            return
+        with self._cache_lock:
+            cache[key] = (time.monotonic(), result)
+            cache.move_to_end(key)
+            if len(cache) > RESPONSE_CACHE_SIZE:
+                cache.popitem(last=False)
+    
+    def _last_good_key(self, endpoint: str, payload: Dict[str, Any]) -> str:
+        digest = hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+        return f"{endpoint}:{digest}"
+    
+    def _remember(self, endpoint: str, payload: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+        """Record a successful response as the fallback for this request"""
+        # Only objects can be marked stale later; other bodies (e.g. null) are passed through unrecorded
+        if not isinstance(result, dict):
+            return result
+        key = self._last_good_key(endpoint, payload)
+        with self._cache_lock:
+            self._last_good[key] = (time.time(), result)
+            self._last_good.move_to_end(key)
+            if len(self._last_good) > LAST_GOOD_CACHE_SIZE:
+                self._last_good.popitem(last=False)
+        return result
+    
+    def _stale_or_error(self, endpoint: str, payload: Dict[str, Any], error: Exception) -> Dict[str, Any]:
+        """Fall back to the last good response for this request, or report the error"""
+        with self._cache_lock:
+            entry = self._last_good.get(self._last_good_key(endpoint, payload))
+        if entry is None:
+            return {"error": str(error)}
+        stored_at, result = entry
+        return {**result, "stale": True, "stale_age": time.time() - stored_at}
+    
+    def close(self):
+        """Close pooled connections to the MCP server"""
+        self.client.close()
+    
+    def _post(self, path: str, payload: Dict[str, Any], action: str, stale_ok: bool = False) -> Dict[str, Any]:
+        """POST to an MCP endpoint, returning the JSON body or an error dict
+        
+        With stale_ok, successes are remembered and failures fall back to the last good response.
+        """
+        try:
+            response = self.client.post(path, json=payload)
             response.raise_for_status()
-            return response.json()
+            result = response.json()
         except Exception as e:
-            logger.error(f"Error analyzing logo: {e}")
-            return {"error": str(e)}
+            logger.error(f"Error {action}: {e}")
+            return self._stale_or_error(path, payload, e) if stale_ok else {"error": str(e)}
+        return self._remember(path, payload, result) if stale_ok else result
+    
+    def analyze_logo(self, logo_url: str) -> Dict[str, Any]:
+        """Analyze a logo using OpenAI Vision API"""
+        key = hashlib.sha1(logo_url.strip().encode()).hexdigest()
+        return self._cached_call(self._logo_cache, key, LOGO_CACHE_TTL,
+                                 lambda: self._post("/analyze_logo", {"logo_url": logo_url},
+                                                    "analyzing logo", stale_ok=True))
     
     def suggest_products(self, team_name: str, sport: str = "") -> Dict[str, Any]:
         """Get product suggestions for a team"""
-        try:
-            response = self.client.post(
-                f"{self.base_url}/suggest_products",
-                json={
-                    "team_name": team_name,
-                    "sport": sport,
-                    "target_audience": "youth_sports"
-                }
-            )
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            logger.error(f"Error getting product suggestions: {e}")
-            return {"error": str(e)}
+        key = (team_name.lower(), sport.lower())
+        payload = {
+            "team_name": team_name,
+            "sport": sport,
+            "target_audience": "youth_sports"
+        }
+        return self._cached_call(self._product_cache, key, PRODUCT_CACHE_TTL,
+                                 lambda: self._post("/suggest_products", payload,
+                                                    "getting product suggestions", stale_ok=True))
     
     def create_team_mockup(self, logo_url: str, product_id: str, team_name: str, sport: str = "", color: str = "") -> Dict[str, Any]:
         """Create a team mockup using the MCP server"""
-        try:
-            payload = {
-                "logo_url": logo_url,
-                "product_id": product_id,
-                "team_name": team_name,
-                "sport": sport
-            }
-            if color:
-                payload["color"] = color
-                
-            response = self.client.post(
-                f"{self.base_url}/create_mockup",
-                json=payload
-            )
-            response.raise_for_status()
-            result = response.json()
-            return result if result is not None else {"error": "No response from server"}
-        except Exception as e:
-            logger.error(f"Error creating team mockup: {e}")
-            return {"error": str(e)}
+        payload = {
+            "logo_url": logo_url,
+            "product_id": product_id,
+            "team_name": team_name,
+            "sport": sport
+        }
+        if color:
+            payload["color"] = color
+        
+        result = self._post("/create_mockup", payload, "creating team mockup")
+        return result if result is not None else {"error": "No response from server"}
     
     def get_analytics(self, team_name: str = "") -> Dict[str, Any]:
         """Get analytics for team orders"""
-        try:
-            response = self.client.post(
-                f"{self.base_url}/get_analytics",
-                json={"team_name": team_name}
-            )
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            logger.error(f"Error getting analytics: {e}")
-            return {"error": str(e)}
+        return self._post("/get_analytics", {"team_name": team_name}, "getting analytics", stale_ok=True)
     
     def bulk_order_handler(self, team_name: str, product_ids: list, quantities: list) -> Dict[str, Any]:
         """Handle bulk orders for teams"""
-        try:
-            response = self.client.post(
-                f"{self.base_url}/bulk_order",
-                json={
-                    "team_name": team_name,
-                    "product_ids": product_ids,
-                    "quantities": quantities
-                }
-            )
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            logger.error(f"Error handling bulk order: {e}")
-            return {"error": str(e)}
+        payload = {
+            "team_name": team_name,
+            "product_ids": product_ids,
+            "quantities": quantities
+        }
+        return self._post("/bulk_order", payload, "handling bulk order")
     
     def health_check(self) -> Dict[str, Any]:
         """Check MCP server health"""
         try:
-            response = self.client.get(f"{self.base_url}/health")
+            response = self.client.get("/health")
             response.raise_for_status()
             return response.json()
         except Exception as e:
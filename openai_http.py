@@ -0,0 +1,20 @@
+import os
+import httpx
+from openai import OpenAI
+
+# One connection pool for every OpenAI client in the process, sized above the SDK default so
+# concurrent analyses don't queue for a connection; fail fast if the API can't be reached
+OPENAI_HTTP_CLIENT = httpx.Client(
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+    timeout=httpx.Timeout(30.0, connect=5.0)
+)
+
+# The SDK retries rate limits, timeouts, connection errors and 5xx with jittered exponential
+# backoff that honors Retry-After; allow one more attempt than its default before falling back
+OPENAI_MAX_RETRIES = 3
+
+
+def create_openai_client() -> OpenAI:
+    """Build an OpenAI client on the shared connection pool"""
+    return OpenAI(api_key=os.getenv('OPENAI_API_KEY'), http_client=OPENAI_HTTP_CLIENT,
+                  max_retries=OPENAI_MAX_RETRIES)
@@ -1,62 +1,403 @@
 import os
+import re
+import json
+import hashlib
 import logging
-from openai import OpenAI
-from typing import Dict, Optional
+import sqlite3
+import threading
+import time
+import httpx
+from io import BytesIO
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from openai import OpenAIError
+from PIL import Image
+from pydantic import BaseModel, ConfigDict
+from typing import Dict, Iterator, List, Literal, Optional, Tuple, Type
 from dotenv import load_dotenv
 
+from openai_http import create_openai_client
+
 # Load environment variables
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Smaller model for classification and short replies; override to roll back without a deploy
+CLASSIFIER_MODEL = os.getenv("OPENAI_CLASSIFIER_MODEL", "gpt-4o-mini")
+
+# Number of completions kept for exact-repeat prompts
+COMPLETION_CACHE_SIZE = 4096
+
+# Output budgets for the JSON analyses: room for the schema plus a short reasoning string,
+# so a rambling answer can't run up output tokens (a truncated answer falls back like any error)
+PARENT_REQUEST_MAX_TOKENS = 300
+COLOR_REQUEST_MAX_TOKENS = 150
+LOGO_COLORS_MAX_TOKENS = 200
+PRODUCT_REQUEST_MAX_TOKENS = 150
+
+# Concurrent palette requests when analyzing several products for one logo
+LOGO_COLORS_MAX_WORKERS = 10
+
+# Completions sampled above this temperature are meant to vary, so they are never cached
+MAX_CACHEABLE_TEMPERATURE = 0.5
+
+# Background pool for palette requests started as soon as a logo arrives, and how many unclaimed
+# results to hold on to
+PREWARM_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="logo-colors-prewarm")
+PREWARMED_LOGO_COLORS_SIZE = 64
+
+# Logo palettes are extracted locally and sent as text; the model never needed to see the image
+LOGO_PALETTE_SIZE = 6
+LOGO_PALETTE_CACHE_SIZE = 256
+LOGO_MAX_BYTES = 10 * 1024 * 1024
+LOGO_DOWNLOAD_TIMEOUT = 10
+# Palettes persist here keyed by a hash of the image bytes, so a logo re-uploaded under a new URL
+# is recognized; each URL's ETag is kept too so an unchanged logo isn't downloaded again
+LOGO_PALETTE_DB = os.getenv("LOGO_PALETTE_DB", os.path.expanduser("~/.cache/mim/logo_palettes.sqlite3"))
+
+
+class LogoPaletteStore:
+    """SQLite-backed palette cache shared by every thread in the process"""
+    
+    def __init__(self, path: str = LOGO_PALETTE_DB):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS logo_palettes (sha TEXT PRIMARY KEY, palette TEXT, ts INTEGER)"
+            )
+            self._conn.execute("CREATE TABLE IF NOT EXISTS logo_urls (url TEXT PRIMARY KEY, etag TEXT, sha TEXT)")
+    
+    def palette(self, sha: str) -> Optional[List[str]]:
+        with self._lock:
+            row = self._conn.execute("SELECT palette FROM logo_palettes WHERE sha = ?", (sha,)).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def save_palette(self, sha: str, palette: List[str]):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO logo_palettes VALUES (?, ?, ?)", (sha, json.dumps(palette), int(time.time()))
+            )
+    
+    def url_entry(self, url: str) -> Tuple[Optional[str], Optional[str]]:
+        """Return the (etag, sha) last seen for a URL"""
+        with self._lock:
+            row = self._conn.execute("SELECT etag, sha FROM logo_urls WHERE url = ?", (url,)).fetchone()
+        return row if row else (None, None)
+    
+    def save_url(self, url: str, etag: Optional[str], sha: str):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO logo_urls VALUES (?, ?, ?)", (url, etag, sha))
+
+
+def palette_from_image(image_bytes: bytes, color_count: int = LOGO_PALETTE_SIZE) -> List[str]:
+    """Return the image's dominant colors as hex strings, most common first"""
+    with Image.open(BytesIO(image_bytes)) as img:
+        # Nearest-neighbour keeps edge blends from showing up as extra near-duplicate colors
+        img.thumbnail((100, 100), Image.Resampling.NEAREST)
+        rgba = img.convert("RGBA")
+    # Ignore transparent background so it doesn't crowd out the real colors
+    pixels = [pixel[:3] for pixel in rgba.getdata() if pixel[3] >= 128]
+    if not pixels:
+        return []
+    opaque = Image.new("RGB", (len(pixels), 1))
+    opaque.putdata(pixels)
+    
+    quantized = opaque.quantize(colors=color_count)
+    palette = quantized.getpalette()
+    counts = sorted(quantized.getcolors(), reverse=True)
+    return ["#{:02X}{:02X}{:02X}".format(*palette[index * 3:index * 3 + 3]) for _, index in counts]
+
+
+def _read_capped(response: httpx.Response) -> Optional[bytes]:
+    """Read a streamed response body, returning None as soon as it exceeds LOGO_MAX_BYTES"""
+    # The URL is user-supplied, so reject on Content-Length up front and still enforce the cap on the bytes received
+    declared = response.headers.get("Content-Length")
+    if declared and declared.isdigit() and int(declared) > LOGO_MAX_BYTES:
+        return None
+    buffer = BytesIO()
+    for chunk in response.iter_bytes():
+        if buffer.tell() + len(chunk) > LOGO_MAX_BYTES:
+            return None
+        buffer.write(chunk)
+    return buffer.getvalue()
+
+
+def extract_logo_palette(logo_url: str, store: Optional[LogoPaletteStore] = None) -> List[str]:
+    """Return the logo's dominant colors, reusing stored palettes; empty if it can't be read"""
+    try:
+        etag = known_palette = None
+        if logo_url.startswith(("http://", "https://")):
+            headers = {}
+            if store:
+                known_etag, known_sha = store.url_entry(logo_url)
+                known_palette = store.palette(known_sha) if known_sha else None
+                if known_etag and known_palette:
+                    headers["If-None-Match"] = known_etag
+            with httpx.stream("GET", logo_url, headers=headers, timeout=LOGO_DOWNLOAD_TIMEOUT,
+                              follow_redirects=True) as response:
+                if response.status_code == 304:
+                    return known_palette
+                response.raise_for_status()
+                image_bytes = _read_capped(response)
+                etag = response.headers.get("ETag")
+        elif os.path.isfile(logo_url):
+            if os.path.getsize(logo_url) > LOGO_MAX_BYTES:
+                return []
+            with open(logo_url, "rb") as f:
+                image_bytes = f.read()
+        else:
+            return []
+        if image_bytes is None:
+            logger.warning(f"Logo {logo_url} is larger than {LOGO_MAX_BYTES} bytes, not extracting its palette")
+            return []
+        
+        sha = hashlib.blake2b(image_bytes, digest_size=16).hexdigest()
+        palette = store.palette(sha) if store else None
+        if palette is None:
+            palette = palette_from_image(image_bytes)
+            if store and palette:
+                store.save_palette(sha, palette)
+        if store and etag:
+            store.save_url(logo_url, etag, sha)
+        return palette
+    except (httpx.HTTPError, OSError, sqlite3.Error, Image.DecompressionBombError) as e:
+        logger.warning(f"Could not extract palette from logo {logo_url}: {e}")
+        return []
+
+# Static system prompts come first and byte-identical on every call so the API can reuse the cached
+# prompt prefix; per-request data goes in a separate message after them
+PARENT_REQUEST_PROMPT = """You assist parents ordering custom merchandise for their kids' youth sports teams.
+Products: Unisex Jersey Short Sleeve Tee (shirt), Unisex College Hoodie (hoodie).
+Determine whether a product type (shirt, hoodie) was specified, extract any team/sport mentioned, note whether they want to upload a logo, and write a friendly, enthusiastic sports-parent reply.
+Respond in JSON:
+{
+    "product_specified": true/false,
+    "product_type": "shirt"|"hoodie"|null,
+    "sport_mentioned": "sport name or null",
+    "team_mentioned": "team name or null",
+    "wants_logo": true/false,
+    "response_message": "friendly response to parent",
+    "needs_clarification": true/false
+}"""
+
+COLOR_REQUEST_PROMPT = """You are a color analyst for youth sports merchandise. Match a parent's color request, in the context of their team logo, to the best available color; the product, available colors and the logo's dominant colors follow in the next system message.
+Rules:
+- "same as logo" / "like in logo": match prominent logo colors
+- "Light blue", "aqua", "sky blue" map to lighter blue variants
+- "Navy", "dark blue" map to darker blue variants
+- Handle synonyms (e.g., "canvas red" = red); otherwise choose the closest available match
+Respond in JSON:
+{
+    "best_color_match": "exact color name from available list",
+    "confidence": "high|medium|low",
+    "reasoning": "brief explanation of why this color was chosen",
+    "logo_colors_considered": "brief description of logo colors if relevant"
+}"""
+
+LOGO_COLORS_PROMPT = """You are a color consultant for youth sports merchandise. From the available colors, pick the 6 that look best with the team's logo; the product, available colors and the logo's dominant colors follow in the next system message.
+Include colors matching prominent logo colors and complementary ones, favor classic sports colors (navy, black, white, red, royal blue), and prefer versatile colors that suit both boys and girls.
+Respond in JSON:
+{
+    "top_6_colors": ["color1", "color2", "color3", "color4", "color5", "color6"],
+    "reasoning": "brief explanation of color selection strategy",
+    "logo_color_analysis": "brief description of the logo's color palette"
+}"""
+
+PRODUCT_REQUEST_PROMPT = """You are a product analyst for youth sports merchandise. Match a parent's product request to the best available product; the products follow in the next system message.
+Rules:
+- Match on product type (shirt, hoodie, etc.) and named features (jersey, heavy cotton, softstyle, midweight, fleece, etc.)
+- Synonyms: sweatshirt = hoodie, tee = shirt
+- Prefer the most specific match; default to popular options if the request is vague
+Respond in JSON:
+{
+    "best_product_match": "product_id",
+    "confidence": "high|medium|low",
+    "reasoning": "brief explanation of why this product was chosen",
+    "product_type_detected": "shirt|hoodie|other"
+}"""
+
+# Keyword fast path for analyze_parent_request: a message made only of one product word, logo words,
+# colors and filler needs no model call. Anything else (a team or sport name, both products, any
+# word off the list) goes to the model so nothing it would extract is lost
+_SHIRT_RE = re.compile(r"\b(t-?shirts?|tees?|shirts?|jerseys?)\b")
+_HOODIE_RE = re.compile(r"\b(hoodies?|sweatshirts?|fleeces?)\b")
+_LOGO_RE = re.compile(r"\b(logos?|upload|url|image)\b")
+_FAST_INTENT_WORD_RE = re.compile(r"[a-z]+(?:-[a-z]+)?")
+FAST_INTENT_WORDS = frozenset("""
+    i we want wanna need would like love to get make order buy create design have a an one some the
+    please can could you me us my our custom new with and in
+    t-shirt t-shirts tee tees shirt shirts jersey jerseys hoodie hoodies sweatshirt sweatshirts fleece fleeces
+    logo logos upload url image
+    black white gray grey navy blue red green yellow orange purple pink maroon gold royal light dark
+""".split())
+
+PRODUCT_CLARIFICATION_PROMPT = """You are a helpful youth sports merchandise assistant.
+Generate a friendly, enthusiastic message asking a parent to choose from available products.
+Keep it concise and sports-parent friendly."""
+
+LOGO_REQUEST_PROMPT = """You are a helpful youth sports merchandise assistant.
+Generate a friendly, concise message asking a parent to provide their team logo.
+Mention they can upload a file or provide a URL. Keep it enthusiastic and brief."""
+
+class ParentRequest(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+    
+    product_specified: bool
+    product_type: Optional[Literal["shirt", "hoodie"]]
+    sport_mentioned: Optional[str]
+    team_mentioned: Optional[str]
+    wants_logo: bool
+    response_message: str
+    needs_clarification: bool
+
+class ColorMatch(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+    
+    best_color_match: str
+    confidence: Literal["high", "medium", "low"]
+    reasoning: str
+    logo_colors_considered: str
+
+class ProductMatch(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+    
+    best_product_match: str
+    confidence: Literal["high", "medium", "low"]
+    reasoning: str
+    product_type_detected: Literal["shirt", "hoodie", "other"]
+
 class OpenAIService:
     def __init__(self):
-        self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-        
+        self.client = create_openai_client()
+        # hash of (model, messages, sampling options) -> completion text, least recently used first
+        self._completion_cache: "OrderedDict[str, str]" = OrderedDict()
+        # Methods may be called from worker threads, so cache updates are serialized
+        self._cache_lock = threading.Lock()
+        # logo URL -> dominant hex colors, least recently used first; failed extractions are not kept
+        self._palette_cache: "OrderedDict[str, List[str]]" = OrderedDict()
+        # logo URL -> (products_and_colors, Future) for palette requests started ahead of need
+        self._prewarmed_logo_colors: "OrderedDict[str, tuple]" = OrderedDict()
+        try:
+            self._palette_store = LogoPaletteStore()
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Logo palette store unavailable, palettes will only be cached in memory: {e}")
+            self._palette_store = None
+    
+    def _cache_palette(self, logo_url: str, palette: List[str]) -> List[str]:
+        if palette:
+            with self._cache_lock:
+                self._palette_cache[logo_url] = palette
+                if len(self._palette_cache) > LOGO_PALETTE_CACHE_SIZE:
+                    self._palette_cache.popitem(last=False)
+        return palette
+    
+    def _logo_colors_line(self, logo_url: str) -> str:
+        """Describe the logo for a prompt by its dominant colors, falling back to the bare URL"""
+        with self._cache_lock:
+            palette = self._palette_cache.get(logo_url)
+            if palette is not None:
+                self._palette_cache.move_to_end(logo_url)
+        if palette is None:
+            palette = self._cache_palette(logo_url, extract_logo_palette(logo_url, self._palette_store))
+        
+        if palette:
+            return f"Logo dominant colors: {', '.join(palette)}"
+        return f"Logo URL: {logo_url}"
+    
+    def _chat(self, messages: List[Dict], temperature: float, max_tokens: Optional[int] = None,
+              json_mode: bool = False, model: str = CLASSIFIER_MODEL,
+              schema: Optional[Type[BaseModel]] = None) -> str:
+        """Run a chat completion, serving exact repeats of low-temperature prompts from cache"""
+        cacheable = temperature <= MAX_CACHEABLE_TEMPERATURE
+        if cacheable:
+            key = hashlib.sha256(json.dumps(
+                [model, messages, temperature, max_tokens, json_mode, schema.__name__ if schema else None]
+            ).encode()).hexdigest()
+            with self._cache_lock:
+                cached = self._completion_cache.get(key)
+                if cached is not None:
+                    self._completion_cache.move_to_end(key)
+                    return cached
+        
+        options = {}
+        if max_tokens is not None:
+            options["max_tokens"] = max_tokens
+        if schema is not None:
+            # Structured Outputs: the API guarantees a reply that parses against the schema
+            options["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": schema.__name__, "schema": schema.model_json_schema(), "strict": True}
+            }
+        elif json_mode:
+            options["response_format"] = {"type": "json_object"}
+        
+        response = self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            **options
+        )
+        content = response.choices[0].message.content
+        if content is None:
+            # Refusals and content-filter stops carry no text; raise so callers take their fallback path
+            raise OpenAIError(f"Completion returned no content (finish_reason={response.choices[0].finish_reason})")
+        
+        if cacheable:
+            with self._cache_lock:
+                self._completion_cache[key] = content
+                if len(self._completion_cache) > COMPLETION_CACHE_SIZE:
+                    self._completion_cache.popitem(last=False)
+        return content
+        
+    def _try_fast_intent(self, message: str) -> Optional[Dict]:
+        """Classify an obvious product request locally, or return None if the model is needed"""
+        text = message.lower()
+        words = _FAST_INTENT_WORD_RE.findall(text)
+        if not words or any(word not in FAST_INTENT_WORDS for word in words):
+            return None
+        
+        is_shirt = bool(_SHIRT_RE.search(text))
+        is_hoodie = bool(_HOODIE_RE.search(text))
+        if is_shirt == is_hoodie:
+            return None
+        
+        product_type = "shirt" if is_shirt else "hoodie"
+        return {
+            "product_specified": True,
+            "product_type": product_type,
+            "sport_mentioned": None,
+            "team_mentioned": None,
+            "wants_logo": bool(_LOGO_RE.search(text)),
+            "response_message": f"Great choice! Let's make your team a custom {product_type}.",
+            "needs_clarification": False
+        }
+    
     def analyze_parent_request(self, message: str, context: str = "") -> Dict:
         """Analyze parent's message to understand their product needs"""
         
-        system_prompt = """You are a helpful assistant for a youth sports team merchandise service. 
-        Parents message you wanting to customize products for their kids' sports teams.
-        
-        Available products:
-        - Unisex Jersey Short Sleeve Tee (shirt)
-        - Unisex College Hoodie (hoodie)
-        
-        Your job is to:
-        1. Determine if the parent has specified a product type (shirt, hoodie)
-        2. Extract any team/sport information mentioned
-        3. Note if they want to upload a logo
-        4. Provide a friendly, enthusiastic sports parent response
-        
-        Respond in JSON format with:
-        {
-            "product_specified": true/false,
-            "product_type": "shirt"|"hoodie"|null,
-            "sport_mentioned": "sport name or null",
-            "team_mentioned": "team name or null", 
-            "wants_logo": true/false,
-            "response_message": "friendly response to parent",
-            "needs_clarification": true/false
-        }"""
+        if not context:
+            result = self._try_fast_intent(message)
+            if result is not None:
+                logger.info(f"Fast-path analysis result: {result}")
+                return result
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4-turbo-preview",
-                messages=[
-                    {"role": "system", "content": system_prompt},
+            content = self._chat(
+                [
+                    {"role": "system", "content": PARENT_REQUEST_PROMPT},
                     {"role": "user", "content": f"Context: {context}\n\nParent message: {message}"}
                 ],
-                response_format={"type": "json_object"},
-                temperature=0.3
+                temperature=0.0, max_tokens=PARENT_REQUEST_MAX_TOKENS, schema=ParentRequest
             )
             
-            import json
-            result = json.loads(response.choices[0].message.content)
+            result = ParentRequest.model_validate_json(content).model_dump()
             logger.info(f"OpenAI analysis result: {result}")
             return result
             
-        except Exception as e:
+        except (OpenAIError, ValueError) as e:
             logger.error(f"OpenAI API error: {e}")
             return {
                 "product_specified": False,
@@ -68,127 +409,157 @@ class OpenAIService:
                 "needs_clarification": True
             }
     
+    def _chat_stream(self, messages: List[Dict], temperature: float, max_tokens: Optional[int] = None,
+                     model: str = CLASSIFIER_MODEL) -> Iterator[str]:
+        """Run a chat completion, yielding the reply text as it is generated"""
+        options = {}
+        if max_tokens is not None:
+            options["max_tokens"] = max_tokens
+        
+        stream = self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            stream=True,
+            **options
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    
+    def _stream_reply(self, messages: List[Dict], max_tokens: int, fallback: str) -> Iterator[str]:
+        """Stream a short user-facing reply, falling back to canned text if generation fails
+        
+        If the stream breaks after some text was sent, the fallback is appended so the reply doesn't just stop.
+        """
+        produced = False
+        try:
+            for text in self._chat_stream(messages, temperature=0.7, max_tokens=max_tokens):
+                # Leading whitespace would otherwise show up in the first Slack update
+                text = text.lstrip() if not produced else text
+                if text:
+                    produced = True
+                    yield text
+            return
+        # The SDK only wraps errors raised while sending; a connection dropped mid-stream surfaces from httpx
+        except (OpenAIError, httpx.HTTPError) as e:
+            logger.error(f"OpenAI streaming error: {e}")
+        yield f"…\n\n{fallback}" if produced else fallback
+    
+    def _product_clarification_messages(self, products_text: str) -> List[Dict]:
+        return [
+            {"role": "system", "content": PRODUCT_CLARIFICATION_PROMPT},
+            {"role": "user", "content": f"Ask parent to choose from these products: {products_text}"}
+        ]
+    
     def generate_product_clarification(self, available_products: list) -> str:
         """Generate a friendly message asking parents to specify product type"""
         
-        system_prompt = """You are a helpful youth sports merchandise assistant. 
-        Generate a friendly, enthusiastic message asking a parent to choose from available products.
-        Keep it concise and sports-parent friendly."""
-        
         products_text = ", ".join(available_products)
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4-turbo-preview",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": f"Ask parent to choose from these products: {products_text}"}
-                ],
-                temperature=0.7,
-                max_tokens=150
+            content = self._chat(
+                self._product_clarification_messages(products_text),
+                temperature=0.7, max_tokens=150
             )
             
-            return response.choices[0].message.content.strip()
+            return content.strip()
             
-        except Exception as e:
+        except OpenAIError as e:
             logger.error(f"OpenAI API error: {e}")
             return f"Which product would you like to customize? We have: {products_text}"
     
-    def generate_logo_request_message(self, product_name: str, team_info: str = "") -> str:
-        """Generate message asking parent for team logo"""
-        
+    def generate_product_clarification_stream(self, available_products: list) -> Iterator[str]:
+        """Streaming version of generate_product_clarification"""
+        products_text = ", ".join(available_products)
+        return self._stream_reply(
+            self._product_clarification_messages(products_text), 150,
+            f"Which product would you like to customize? We have: {products_text}"
+        )
+    
+    def _logo_request_messages(self, product_name: str, team_info: str) -> List[Dict]:
         team_context = f" for {team_info}" if team_info else ""
         
-        system_prompt = """You are a helpful youth sports merchandise assistant.
-        Generate a friendly, concise message asking a parent to provide their team logo.
-        Mention they can upload a file or provide a URL. Keep it enthusiastic and brief."""
+        return [
+            {"role": "system", "content": LOGO_REQUEST_PROMPT},
+            {"role": "user", "content": f"Ask for team logo for {product_name}{team_context}"}
+        ]
+    
+    def generate_logo_request_message(self, product_name: str, team_info: str = "") -> str:
+        """Generate message asking parent for team logo"""
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4-turbo-preview",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": f"Ask for team logo for {product_name}{team_context}"}
-                ],
-                temperature=0.7,
-                max_tokens=100
+            content = self._chat(
+                self._logo_request_messages(product_name, team_info),
+                temperature=0.7, max_tokens=100
             )
             
-            return response.choices[0].message.content.strip()
+            return content.strip()
             
-        except Exception as e:
+        except OpenAIError as e:
             logger.error(f"OpenAI API error: {e}")
             return f"Great choice on the {product_name}! Please upload your team logo (image file) or provide a URL link to your logo, and I'll customize it for you."
+    
+    def generate_logo_request_message_stream(self, product_name: str, team_info: str = "") -> Iterator[str]:
+        """Streaming version of generate_logo_request_message"""
+        return self._stream_reply(
+            self._logo_request_messages(product_name, team_info), 100,
+            f"Great choice on the {product_name}! Please upload your team logo (image file) or provide a URL link to your logo, and I'll customize it for you."
+        )
 
     def get_contextual_response(self, context_prompt: str, user_message: str) -> str:
         """Generate context-aware response using LLM intelligence"""
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4-turbo-preview",
-                messages=[
+            content = self._chat(
+                [
                     {"role": "system", "content": context_prompt},
                     {"role": "user", "content": user_message}
                 ],
-                temperature=0.7,
-                max_tokens=200
+                temperature=0.7, max_tokens=200
             )
             
-            return response.choices[0].message.content.strip()
+            return content.strip()
             
-        except Exception as e:
+        except OpenAIError as e:
             logger.error(f"OpenAI contextual response error: {e}")
             return "I'd be happy to help you with your team merchandise! What would you like to create next?"
+    
+    def get_contextual_response_stream(self, context_prompt: str, user_message: str) -> Iterator[str]:
+        """Streaming version of get_contextual_response"""
+        return self._stream_reply(
+            [
+                {"role": "system", "content": context_prompt},
+                {"role": "user", "content": user_message}
+            ],
+            200,
+            "I'd be happy to help you with your team merchandise! What would you like to create next?"
+        )
 
     def analyze_color_request(self, user_request: str, logo_url: str, available_colors: list, product_name: str) -> Dict:
         """Use AI to analyze user's color request and match it to available colors with logo context"""
         
-        system_prompt = f"""You are an expert color analyst for youth sports merchandise. 
-        
-        A parent has uploaded a team logo and is requesting a specific color for their {product_name}.
-        
-        Your job is to:
-        1. Analyze the user's color request in the context of their team logo
-        2. Consider the logo's colors when they mention "same color as logo" or "similar to logo"
-        3. Match their request to the best available color option
-        4. Provide reasoning for your choice
-        
-        Available colors for {product_name}: {', '.join(available_colors)}
-        
-        Logo URL: {logo_url}
-        
-        Consider these guidelines:
-        - If they mention "same as logo" or "like in logo", try to match prominent logo colors
-        - "Light blue", "aqua", "sky blue" typically map to lighter blue variants
-        - "Navy", "dark blue" map to darker blue variants  
-        - Be intelligent about color synonyms (e.g., "canvas red" = red)
-        - Choose the closest available match if exact color isn't available
-        
-        Respond in JSON format:
-        {{
-            "best_color_match": "exact color name from available list",
-            "confidence": "high|medium|low",
-            "reasoning": "brief explanation of why this color was chosen",
-            "logo_colors_considered": "brief description of logo colors if relevant"
-        }}"""
+        request_details = (
+            f"Product: {product_name}\n"
+            f"Available colors for {product_name}: {', '.join(available_colors)}\n"
+            f"{self._logo_colors_line(logo_url)}"
+        )
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4-turbo-preview",
-                messages=[
-                    {"role": "system", "content": system_prompt},
+            content = self._chat(
+                [
+                    {"role": "system", "content": COLOR_REQUEST_PROMPT},
+                    {"role": "system", "content": request_details},
                     {"role": "user", "content": f"User's color request: '{user_request}'"}
                 ],
-                response_format={"type": "json_object"},
-                temperature=0.3
+                temperature=0.0, max_tokens=COLOR_REQUEST_MAX_TOKENS, schema=ColorMatch
             )
             
-            import json
-            result = json.loads(response.choices[0].message.content)
+            result = ColorMatch.model_validate_json(content).model_dump()
             logger.info(f"AI color analysis result: {result}")
             return result
             
-        except Exception as e:
+        except (OpenAIError, ValueError) as e:
             logger.error(f"OpenAI color analysis error: {e}")
             # Fallback to first available color
             return {
@@ -201,50 +572,27 @@ class OpenAIService:
     def get_logo_inspired_colors(self, logo_url: str, available_colors: list, product_name: str) -> Dict:
         """Use AI to select top 6 colors that would look best with the logo for a specific product"""
         
-        system_prompt = f"""You are an expert color consultant for youth sports merchandise.
-        
-        A team has uploaded a logo and wants to see the best color options for their {product_name}.
-        
-        Your job is to:
-        1. Analyze the logo's color palette and overall aesthetic
-        2. Select the top 6 colors from available options that would look best with this logo
-        3. Consider both colors that match the logo and complementary colors that would look good
-        4. Prioritize colors that are popular for youth sports teams
-        
-        Logo URL: {logo_url}
-        Available colors for {product_name}: {', '.join(available_colors)}
-        
-        Consider these guidelines:
-        - Include colors that directly match prominent logo colors
-        - Include complementary colors that work well with the logo
-        - Consider classic sports colors (navy, black, white, red, royal blue)
-        - Think about what a parent would want for their kid's team
-        - Prioritize versatile colors that work for both boys and girls
-        
-        Respond in JSON format:
-        {{
-            "top_6_colors": ["color1", "color2", "color3", "color4", "color5", "color6"],
-            "reasoning": "brief explanation of color selection strategy",
-            "logo_color_analysis": "brief description of the logo's color palette"
-        }}"""
+        request_details = (
+            f"Product: {product_name}\n"
+            f"Available colors for {product_name}: {', '.join(available_colors)}\n"
+            f"{self._logo_colors_line(logo_url)}"
+        )
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4-turbo-preview",
-                messages=[
-                    {"role": "system", "content": system_prompt},
+            content = self._chat(
+                [
+                    {"role": "system", "content": LOGO_COLORS_PROMPT},
+                    {"role": "system", "content": request_details},
                     {"role": "user", "content": f"Please select the top 6 colors for {product_name} that would work best with this logo."}
                 ],
-                response_format={"type": "json_object"},
-                temperature=0.3
+                temperature=0.0, max_tokens=LOGO_COLORS_MAX_TOKENS, json_mode=True
             )
             
-            import json
-            result = json.loads(response.choices[0].message.content)
+            result = json.loads(content)
             logger.info(f"AI logo-inspired colors for {product_name}: {result}")
             return result
             
-        except Exception as e:
+        except (OpenAIError, ValueError) as e:
             logger.error(f"OpenAI logo color analysis error: {e}")
             # Fallback to first 6 available colors
             fallback_colors = available_colors[:6] if len(available_colors) >= 6 else available_colors
@@ -254,54 +602,79 @@ class OpenAIService:
                 "logo_color_analysis": "Unable to analyze due to error"
             }
 
+    def prewarm_logo_inspired_colors(self, logo_url: str, products_and_colors: Dict[str, list],
+                                     image_path: Optional[str] = None):
+        """Start get_logo_inspired_colors_for_all in the background so a later call finds it ready
+        
+        Pass the local copy of the logo as image_path to take its palette from disk instead of downloading it.
+        """
+        if image_path:
+            self._cache_palette(logo_url, extract_logo_palette(image_path, self._palette_store))
+        future = PREWARM_EXECUTOR.submit(self._logo_inspired_colors_for_all, logo_url, products_and_colors)
+        with self._cache_lock:
+            self._prewarmed_logo_colors[logo_url] = (products_and_colors, future)
+            if len(self._prewarmed_logo_colors) > PREWARMED_LOGO_COLORS_SIZE:
+                self._prewarmed_logo_colors.popitem(last=False)
+    
+    def rename_logo(self, old_url: str, new_url: str):
+        """Carry a logo's cached palette and any prewarmed colors over to the URL it is known by from now on"""
+        with self._cache_lock:
+            palette = self._palette_cache.pop(old_url, None)
+            if palette:
+                self._palette_cache[new_url] = palette
+            prewarmed = self._prewarmed_logo_colors.pop(old_url, None)
+            if prewarmed:
+                self._prewarmed_logo_colors[new_url] = prewarmed
+    
+    def get_logo_inspired_colors_for_all(self, logo_url: str, products_and_colors: Dict[str, list]) -> Dict[str, Dict]:
+        """Run get_logo_inspired_colors for several products at once, keyed by product name"""
+        with self._cache_lock:
+            prewarmed = self._prewarmed_logo_colors.pop(logo_url, None)
+        if prewarmed and prewarmed[0] == products_and_colors:
+            return prewarmed[1].result()
+        return self._logo_inspired_colors_for_all(logo_url, products_and_colors)
+    
+    def _logo_inspired_colors_for_all(self, logo_url: str, products_and_colors: Dict[str, list]) -> Dict[str, Dict]:
+        if not products_and_colors:
+            return {}
+        
+        # Extract the palette once up front so the workers share it instead of each downloading the logo
+        self._logo_colors_line(logo_url)
+        
+        # Each call is an independent round-trip, so bound the fan-out rather than run them back to back
+        with ThreadPoolExecutor(max_workers=min(LOGO_COLORS_MAX_WORKERS, len(products_and_colors))) as executor:
+            futures = {
+                product_name: executor.submit(self.get_logo_inspired_colors, logo_url, colors, product_name)
+                for product_name, colors in products_and_colors.items()
+            }
+            return {product_name: future.result() for product_name, future in futures.items()}
+    
     def analyze_product_request(self, user_request: str, available_products: list) -> Dict:
         """Use AI to analyze user's product request and match it to available products"""
         
-        system_prompt = f"""You are an expert product analyst for youth sports merchandise.
-        
-        A parent is requesting a specific product type for their team merchandise.
-        
-        Your job is to:
-        1. Analyze the user's product request 
-        2. Match their request to the best available product from the list
-        3. Consider product names, descriptions, and user intent
-        4. Provide reasoning for your choice
-        
-        Available products:
-        {chr(10).join([f"- ID: {p['id']}, Name: {p['title']}, Category: {p.get('category', 'unknown')}" for p in available_products])}
-        
-        Consider these guidelines:
-        - Match based on product type (shirt, hoodie, etc.)
-        - Pay attention to specific product features mentioned (jersey, heavy cotton, softstyle, midweight, fleece, etc.)
-        - Consider synonyms (sweatshirt = hoodie, tee = shirt, etc.)
-        - Choose the most specific match when possible
-        - Default to popular options if request is vague
+        request_details = "Available products:\n" + "\n".join(
+            f"- ID: {p['id']}, Name: {p['title']}, Category: {p.get('category', 'unknown')}"
+            for p in available_products
+        )
         
-        Respond in JSON format:
-        {{
-            "best_product_match": "product_id",
-            "confidence": "high|medium|low",
-            "reasoning": "brief explanation of why this product was chosen",
-            "product_type_detected": "shirt|hoodie|other"
-        }}"""
+        # Case and spacing don't change which product matches, so fold them to share cache entries
+        normalized_request = " ".join(user_request.lower().split())
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4-turbo-preview",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": f"User's product request: '{user_request}'"}
+            content = self._chat(
+                [
+                    {"role": "system", "content": PRODUCT_REQUEST_PROMPT},
+                    {"role": "system", "content": request_details},
+                    {"role": "user", "content": f"User's product request: '{normalized_request}'"}
                 ],
-                response_format={"type": "json_object"},
-                temperature=0.3
+                temperature=0.0, max_tokens=PRODUCT_REQUEST_MAX_TOKENS, schema=ProductMatch
             )
             
-            import json
-            result = json.loads(response.choices[0].message.content)
+            result = ProductMatch.model_validate_json(content).model_dump()
             logger.info(f"AI product analysis result: {result}")
             return result
             
-        except Exception as e:
+        except (OpenAIError, ValueError) as e:
             logger.error(f"OpenAI product analysis error: {e}")
             # Fallback to first available product
             fallback_product = available_products[0] if available_products else None
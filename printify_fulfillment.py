@@ -1,8 +1,9 @@
 import os
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from flask import Flask, request, jsonify
 from printify_service import PrintifyService
-from database_service import DatabaseService
+from database_service import database_service
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -10,7 +11,10 @@ logger = logging.getLogger(__name__)
 
 # Initialize services
 printify_service = PrintifyService()
-db_service = DatabaseService()
+db_service = database_service
+
+# Upper bound on concurrent Printify calls while building one order's line items
+LINE_ITEM_WORKERS = 8
 
 app = Flask(__name__)
 
@@ -34,19 +38,23 @@ def fulfill_printify_order():
         
         # For now, we'll create a basic line item
         # In a full implementation, you'd get the design details and create proper line items
-        line_items = []
-        
-        for item in order_items:
+        def create_line_item(item):
             # This is a simplified version - you'll need to map your designs to Printify products
             # For now, let's create a basic hat order
-            line_item_result = printify_service.create_line_item_for_blueprint(
+            return printify_service.create_line_item_for_blueprint(
                 blueprint_id=5,  # Snapback trucker cap
                 print_provider_id=1,  # Generic provider - you'll need to get actual IDs
                 variant_id=17007,  # One size fits most - you'll need actual variant IDs
                 image_id="your-uploaded-image-id",  # You'll need to get this from your design
                 quantity=item['quantity']
             )
-            
+        
+        # Line items are independent Printify lookups, so create them concurrently (results keep item order)
+        with ThreadPoolExecutor(max_workers=min(LINE_ITEM_WORKERS, len(order_items))) as executor:
+            line_item_results = list(executor.map(create_line_item, order_items))
+        
+        line_items = []
+        for line_item_result in line_item_results:
             if line_item_result.get('success'):
                 line_items.append(line_item_result['line_item'])
             else:
@@ -145,4 +153,5 @@ def health_check():
 
 if __name__ == '__main__':
     port = int(os.getenv('PORT', 5001))
-    app.run(host='0.0.0.0', port=port, debug=True) 
\ No newline at end of file
+    # Threaded so one slow Printify call doesn't block other requests; debug only when asked for
+    app.run(host='0.0.0.0', port=port, debug=os.getenv('FLASK_DEBUG') == '1', threaded=True) 
\ No newline at end of file
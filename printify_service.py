@@ -1,7 +1,15 @@
 import os
+import json
+import hashlib
 import requests
 import logging
-from typing import Dict, List, Optional
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 import base64
 import time
 
@@ -9,6 +17,17 @@ import time
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# (connect, read) seconds for every Printify call, so a stalled connection can't hang a handler
+REQUEST_TIMEOUT = (3.05, 30)
+
+# Catalog and product GETs are revalidated with their ETag instead of re-downloaded; entries persist
+# here so a restarted bot starts warm, and the most recent ones are also kept in memory
+ETAG_CACHE_DIR = Path(os.getenv("PRINTIFY_ETAG_CACHE_DIR", Path.home() / ".cache" / "printify" / "etag"))
+ETAG_MEMORY_CACHE_SIZE = 256
+
+# Background lookups that overlap with other work for the same request, shared by every instance
+LOOKUP_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="printify")
+
 class PrintifyService:
     def __init__(self):
         self.api_token = os.getenv('PRINTIFY_API_TOKEN')
@@ -23,10 +42,68 @@ class PrintifyService:
         if not self.api_token:
             raise ValueError("Missing required environment variable: PRINTIFY_API_TOKEN")
         
+        # One pooled session so consecutive Printify calls reuse the TLS connection;
+        # urllib3 only retries idempotent methods, so order and product POSTs are never replayed
+        self._session = requests.Session()
+        self._session.headers.update(self.headers)
+        self._session.mount("https://", HTTPAdapter(
+            pool_connections=20, pool_maxsize=50,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+        ))
+        
+        # URL -> (etag, parsed body), least recently used first
+        self._etag_cache: "OrderedDict[str, Tuple[str, Any]]" = OrderedDict()
+        self._etag_lock = threading.Lock()
+        
+        # (blueprint_id, print_provider_id) -> {variant_id: variant}; the catalog doesn't change under a running bot
+        self._variant_cache: Dict[Tuple[int, int], Dict[int, Dict]] = {}
+        
         # Shop ID only required for shop-specific operations
         if not self.shop_id:
             logger.warning("PRINTIFY_SHOP_ID not set - some operations may not be available")
 
+    def _etag_path(self, url: str) -> Path:
+        return ETAG_CACHE_DIR / f"{hashlib.sha1(url.encode()).hexdigest()}.json"
+    
+    def _cached_get(self, url: str) -> Tuple[int, Any]:
+        """GET a JSON resource, revalidating any cached copy; returns (status, body) with status 200 on a cache hit"""
+        with self._etag_lock:
+            cached = self._etag_cache.get(url)
+            if cached is not None:
+                self._etag_cache.move_to_end(url)
+        if cached is None:
+            try:
+                entry = json.loads(self._etag_path(url).read_text())
+                cached = (entry["etag"], entry["body"])
+            except (OSError, ValueError, KeyError):
+                pass
+        
+        headers = {"If-None-Match": cached[0]} if cached else None
+        response = self._session.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+        if response.status_code == 304 and cached:
+            body = cached[1]
+        elif response.status_code == 200:
+            body = response.json()
+            etag = response.headers.get("ETag")
+            if not etag:
+                return 200, body
+            cached = (etag, body)
+            try:
+                ETAG_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+                self._etag_path(url).write_text(json.dumps({"etag": etag, "body": body}))
+            except OSError as e:
+                logger.warning(f"Could not persist ETag cache entry for {url}: {e}")
+        else:
+            logger.warning(f"GET {url} failed: {response.status_code} - {response.text}")
+            return response.status_code, None
+        
+        with self._etag_lock:
+            self._etag_cache[url] = cached
+            self._etag_cache.move_to_end(url)
+            if len(self._etag_cache) > ETAG_MEMORY_CACHE_SIZE:
+                self._etag_cache.popitem(last=False)
+        return 200, body
+
     def upload_image(self, image_url: str, filename: str) -> Dict:
         """Upload an image to Printify and return the image ID"""
         try:
@@ -35,9 +112,9 @@ class PrintifyService:
                 "url": image_url
             }
             
-            response = requests.post(
+            response = self._session.post(
                 f"{self.base_url}/uploads/images.json",
-                headers=self.headers,
+                timeout=REQUEST_TIMEOUT,
                 json=upload_data
             )
             
@@ -72,9 +149,9 @@ class PrintifyService:
                 "contents": image_base64
             }
             
-            response = requests.post(
+            response = self._session.post(
                 f"{self.base_url}/uploads/images.json",
-                headers=self.headers,
+                timeout=REQUEST_TIMEOUT,
                 json=upload_data
             )
             
@@ -117,9 +194,9 @@ class PrintifyService:
                 }
             }
             
-            response = requests.post(
+            response = self._session.post(
                 f"{self.base_url}/shops/{self.shop_id}/orders.json",
-                headers=self.headers,
+                timeout=REQUEST_TIMEOUT,
                 json=order_data
             )
             
@@ -147,16 +224,12 @@ class PrintifyService:
         """Create a line item for direct order placement with custom design"""
         try:
             # Get blueprint details for print areas
-            blueprint_response = requests.get(
-                f"{self.base_url}/catalog/blueprints/{blueprint_id}/print_providers/{print_provider_id}/variants.json",
-                headers=self.headers
-            )
+            variants = self._get_blueprint_variants(blueprint_id, print_provider_id)
             
-            if blueprint_response.status_code != 200:
-                return {"error": f"Failed to get blueprint variants: {blueprint_response.status_code}"}
+            if variants is None:
+                return {"error": "Failed to get blueprint variants"}
             
-            variants = blueprint_response.json()
-            selected_variant = next((v for v in variants if v['id'] == variant_id), None)
+            selected_variant = variants.get(variant_id)
             
             if not selected_variant:
                 return {"error": f"Variant {variant_id} not found"}
@@ -192,9 +265,9 @@ class PrintifyService:
     def get_order_status(self, order_id: str) -> Dict:
         """Get the current status of an order"""
         try:
-            response = requests.get(
+            response = self._session.get(
                 f"{self.base_url}/shops/{self.shop_id}/orders/{order_id}.json",
-                headers=self.headers
+                timeout=REQUEST_TIMEOUT
             )
             
             if response.status_code == 200:
@@ -260,7 +333,12 @@ class PrintifyService:
             logger.info(f"Creating design for blueprint {blueprint_id}, provider {print_provider_id}, variant {variant_id}")
             
             # Check for existing product design to reuse (unless force_new_product is True)
+            variants_future = None
             if database_service and not force_new_product:
+                # Fetch the variant list while the database is checked; it's only wasted if a product is reused
+                variants_future = LOOKUP_EXECUTOR.submit(
+                    self._get_popular_variant_ids_for_blueprint, blueprint_id, print_provider_id, variant_id
+                )
                 existing_design = database_service.find_existing_product_design(
                     blueprint_id, print_provider_id, image_id, variant_id
                 )
@@ -287,7 +365,10 @@ class PrintifyService:
             
             # Get popular color variants for this blueprint/provider combination
             # Limited to 100 variants due to Printify API constraint
-            all_variant_ids = self._get_popular_variant_ids_for_blueprint(blueprint_id, print_provider_id, variant_id)
+            if variants_future:
+                all_variant_ids = variants_future.result()
+            else:
+                all_variant_ids = self._get_popular_variant_ids_for_blueprint(blueprint_id, print_provider_id, variant_id)
             
             # If we couldn't get variants, fall back to the specific variant
             if not all_variant_ids:
@@ -335,9 +416,9 @@ class PrintifyService:
             logger.info(f"Design data payload: blueprint_id={design_data['blueprint_id']}, print_provider_id={design_data['print_provider_id']}, variant_ids={design_data['print_areas'][0]['variant_ids'][:5]}...")
             
             # Create permanent product in Printify for stable mockup URLs
-            response = requests.post(
+            response = self._session.post(
                 f"{self.base_url}/shops/{self.shop_id}/products.json",
-                headers=self.headers,
+                timeout=REQUEST_TIMEOUT,
                 json=design_data
             )
             
@@ -391,13 +472,9 @@ class PrintifyService:
     def _get_product_mockup(self, product_id: str, variant_id: int = None) -> Dict:
         """Get mockup images from a created product, optionally for a specific variant"""
         try:
-            response = requests.get(
-                f"{self.base_url}/shops/{self.shop_id}/products/{product_id}.json",
-                headers=self.headers
-            )
+            status, product_data = self._cached_get(f"{self.base_url}/shops/{self.shop_id}/products/{product_id}.json")
             
-            if response.status_code == 200:
-                product_data = response.json()
+            if status == 200:
                 images = product_data.get('images', [])
                 
                 # If specific variant requested, look for variant-specific mockup
@@ -432,7 +509,7 @@ class PrintifyService:
                 
                 return {"mockup_url": None}
             else:
-                logger.warning(f"Failed to get product mockup: {response.status_code}")
+                logger.warning(f"Failed to get product mockup: {status}")
                 return {"mockup_url": None}
                 
         except Exception as e:
@@ -443,29 +520,37 @@ class PrintifyService:
         """Get mockup image URL for a specific color variant of an existing product"""
         return self._get_product_mockup(product_id, variant_id)
     
+    def _get_blueprint_variants(self, blueprint_id: int, print_provider_id: int) -> Optional[Dict[int, Dict]]:
+        """Variants of a blueprint/provider pair keyed by id, fetched once per process; None if unavailable"""
+        key = (blueprint_id, print_provider_id)
+        variants = self._variant_cache.get(key)
+        if variants is None:
+            status, data = self._cached_get(
+                f"{self.base_url}/catalog/blueprints/{blueprint_id}/print_providers/{print_provider_id}/variants.json"
+            )
+            if status != 200:
+                logger.warning(f"Failed to get variants: {status}")
+                return None
+            
+            # Handle the response format: {id: X, title: Y, variants: [...]}, or a bare list
+            if isinstance(data, dict):
+                data = data.get('variants', [])
+            elif not isinstance(data, list):
+                data = []
+            variants = {variant['id']: variant for variant in data if variant.get('id')}
+            self._variant_cache[key] = variants
+        return variants
+    
     def _get_all_variant_ids_for_blueprint(self, blueprint_id: int, print_provider_id: int) -> List[int]:
         """Get all available variant IDs for a specific blueprint and print provider combination"""
         try:
-            response = requests.get(
-                f"{self.base_url}/catalog/blueprints/{blueprint_id}/print_providers/{print_provider_id}/variants.json",
-                headers=self.headers
-            )
+            variants = self._get_blueprint_variants(blueprint_id, print_provider_id)
             
-            if response.status_code == 200:
-                data = response.json()
-                
-                # Handle the response format: {id: X, title: Y, variants: [...]}
-                if 'variants' in data:
-                    variants = data['variants']
-                else:
-                    # Fallback if response is directly a list
-                    variants = data if isinstance(data, list) else []
-                
-                variant_ids = [variant['id'] for variant in variants if variant.get('id')]
+            if variants is not None:
+                variant_ids = list(variants)
                 logger.info(f"Found {len(variant_ids)} variants for blueprint {blueprint_id}, provider {print_provider_id}")
                 return variant_ids
             else:
-                logger.warning(f"Failed to get variants: {response.status_code} - {response.text}")
                 return []
                 
         except Exception as e:
@@ -475,19 +560,10 @@ class PrintifyService:
     def _get_popular_variant_ids_for_blueprint(self, blueprint_id: int, print_provider_id: int, requested_variant_id: int) -> List[int]:
         """Get popular color variants (up to 100) for a specific blueprint and print provider"""
         try:
-            response = requests.get(
-                f"{self.base_url}/catalog/blueprints/{blueprint_id}/print_providers/{print_provider_id}/variants.json",
-                headers=self.headers
-            )
+            variants = self._get_blueprint_variants(blueprint_id, print_provider_id)
             
-            if response.status_code == 200:
-                data = response.json()
-                
-                # Handle the response format
-                if 'variants' in data:
-                    all_variants = data['variants']
-                else:
-                    all_variants = data if isinstance(data, list) else []
+            if variants is not None:
+                all_variants = list(variants.values())
                 
                 # Define popular colors in priority order
                 popular_colors = [
@@ -548,7 +624,6 @@ class PrintifyService:
                 return selected_variants
                 
             else:
-                logger.warning(f"Failed to get variants: {response.status_code} - {response.text}")
                 return []
                 
         except Exception as e:
@@ -558,9 +633,9 @@ class PrintifyService:
     def _delete_temporary_product(self, product_id: str):
         """Delete temporary product after getting mockup"""
         try:
-            response = requests.delete(
+            response = self._session.delete(
                 f"{self.base_url}/shops/{self.shop_id}/products/{product_id}.json",
-                headers=self.headers
+                timeout=REQUEST_TIMEOUT
             )
             
             if response.status_code == 200:
@@ -575,15 +650,10 @@ class PrintifyService:
         """Look up blueprint and provider details for a specific product title"""
         try:
             # Get all blueprints
-            response = requests.get(
-                f"{self.base_url}/catalog/blueprints.json",
-                headers=self.headers
-            )
-            
-            if response.status_code != 200:
-                return {"success": False, "error": f"Failed to get blueprints: {response.status_code}"}
+            status, blueprints = self._cached_get(f"{self.base_url}/catalog/blueprints.json")
             
-            blueprints = response.json()
+            if status != 200:
+                return {"success": False, "error": f"Failed to get blueprints: {status}"}
             
             # Find blueprint matching the search title
             matching_blueprint = None
@@ -599,15 +669,10 @@ class PrintifyService:
             logger.info(f"Found blueprint: {blueprint_id} - {matching_blueprint['title']}")
             
             # Get print providers for this blueprint
-            response = requests.get(
-                f"{self.base_url}/catalog/blueprints/{blueprint_id}/print_providers.json",
-                headers=self.headers
-            )
-            
-            if response.status_code != 200:
-                return {"success": False, "error": f"Failed to get print providers: {response.status_code}"}
+            status, providers = self._cached_get(f"{self.base_url}/catalog/blueprints/{blueprint_id}/print_providers.json")
             
-            providers = response.json()
+            if status != 200:
+                return {"success": False, "error": f"Failed to get print providers: {status}"}
             
             if not providers:
                 return {"success": False, "error": "No print providers available"}
@@ -619,15 +684,10 @@ class PrintifyService:
             logger.info(f"Using print provider: {provider_id} - {provider.get('title', 'Unknown')}")
             
             # Get variants for this blueprint/provider combination
-            response = requests.get(
-                f"{self.base_url}/catalog/blueprints/{blueprint_id}/print_providers/{provider_id}/variants.json",
-                headers=self.headers
-            )
-            
-            if response.status_code != 200:
-                return {"success": False, "error": f"Failed to get variants: {response.status_code}"}
+            status, variants = self._cached_get(f"{self.base_url}/catalog/blueprints/{blueprint_id}/print_providers/{provider_id}/variants.json")
             
-            variants = response.json()
+            if status != 200:
+                return {"success": False, "error": f"Failed to get variants: {status}"}
             
             logger.info(f"Found {len(variants) if isinstance(variants, list) else 'unknown count'} variants for blueprint {blueprint_id}")
             
@@ -1,9 +1,43 @@
-import json
+import os
+import mmap
 import logging
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional
 
+import orjson
+
 logger = logging.getLogger(__name__)
 
+
+def load_cache(path: str) -> Dict:
+    """Load a product cache JSON file, parsing it only once per on-disk version.
+
+    The parsed structure is shared between callers, so treat it as read-only.
+    """
+    return _load_cache_cached(path, os.stat(path).st_mtime_ns)
+
+
+@lru_cache(maxsize=8)
+def _load_cache_cached(path: str, mtime_ns: int) -> Dict:
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+        return orjson.loads(view)
+
+
+def save_cache(path: str, data: Dict) -> None:
+    """Serialize a product cache to disk with orjson in a single write.
+
+    The payload goes to a temporary file that replaces ``path`` atomically, so a
+    crash mid-write never leaves a truncated cache behind.
+    """
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
 class ProductService:
     def __init__(self, cache_file_path: str = "product_cache_2items.json"):
         self.cache_file_path = cache_file_path
@@ -16,14 +50,13 @@ class ProductService:
     def _load_cache(self) -> bool:
         """Load the optimized top3 product cache from disk"""
         try:
-            with open(self.cache_file_path, 'r') as f:
-                data = json.load(f)
-                self.products_cache = data.get('products', {})
-                self.cache_metadata = data.get('optimization_info', {})
-                self.providers = data.get('providers', {})
-                
-                logger.info(f"Loaded top3 cache: {len(self.products_cache)} products from {self.cache_metadata.get('categories_included', 0)} categories")
-                return True
+            data = load_cache(self.cache_file_path)
+            self.products_cache = data.get('products', {})
+            self.cache_metadata = data.get('optimization_info', {})
+            self.providers = data.get('providers', {})
+            
+            logger.info(f"Loaded top3 cache: {len(self.products_cache)} products from {self.cache_metadata.get('categories_included', 0)} categories")
+            return True
         except Exception as e:
             logger.error(f"Failed to load product cache: {e}")
             return False
@@ -319,10 +352,6 @@ class ProductService:
     
     def parse_color_preferences_ai(self, text: str, logo_url: str = None) -> List[Dict]:
         """AI-powered color preference parsing with logo context"""
-        from openai_service import openai_service
-        
-        selected_variants = []
-        
         # Use AI to determine which product(s) the user is requesting
         product_match = self.find_product_by_intent_ai(text)
         
@@ -334,47 +363,54 @@ class ProductService:
             # No specific product mentioned, try main products
             target_products = ['12', '92']  # Jersey Tee, College Hoodie only
         
-        # For each target product, use AI to find best color match
-        for product_id in target_products:
-            try:
-                # Get available colors for this product
-                available_colors = self.get_colors_for_product(product_id)
-                if not available_colors:
-                    continue
-                
-                # Get product name
-                product_info = self.get_product_by_id(product_id)
-                product_name = product_info.get('title', 'Product') if product_info else 'Product'
-                
-                # Use AI to analyze color request
-                ai_result = openai_service.analyze_color_request(
-                    user_request=text,
-                    logo_url=logo_url or "No logo provided",
-                    available_colors=available_colors,
-                    product_name=product_name
-                )
-                
-                best_color = ai_result.get('best_color_match')
-                if best_color and best_color in available_colors:
-                    # Find the variant for this color
-                    variant = self._find_variant_by_color(product_id, best_color)
-                    if variant:
-                        selected_variants.append({
-                            'product_id': product_id,
-                            'product_name': product_name,
-                            'color': best_color,
-                            'variant': variant,
-                            'ai_confidence': ai_result.get('confidence', 'medium'),
-                            'ai_reasoning': ai_result.get('reasoning', ''),
-                            'logo_colors_considered': ai_result.get('logo_colors_considered', '')
-                        })
-                        logger.info(f"AI selected {best_color} for {product_name}: {ai_result.get('reasoning')}")
-                
-            except Exception as e:
-                logger.error(f"AI color analysis failed for product {product_id}: {e}")
-                continue
+        # Color analyses for different products are independent, so run them concurrently
+        with ThreadPoolExecutor(max_workers=max(1, len(target_products))) as executor:
+            choices = list(executor.map(
+                lambda product_id: self._choose_color_ai(product_id, text, logo_url), target_products
+            ))
+        return [choice for choice in choices if choice]
+
+    def _choose_color_ai(self, product_id: str, text: str, logo_url: Optional[str]) -> Optional[Dict]:
+        """Ask the AI for the best color of one product, returning the selected variant entry"""
+        from openai_service import openai_service
         
-        return selected_variants
+        try:
+            # Get available colors for this product
+            available_colors = self.get_colors_for_product(product_id)
+            if not available_colors:
+                return None
+            
+            # Get product name
+            product_info = self.get_product_by_id(product_id)
+            product_name = product_info.get('title', 'Product') if product_info else 'Product'
+            
+            # Use AI to analyze color request
+            ai_result = openai_service.analyze_color_request(
+                user_request=text,
+                logo_url=logo_url or "No logo provided",
+                available_colors=available_colors,
+                product_name=product_name
+            )
+            
+            best_color = ai_result.get('best_color_match')
+            if best_color and best_color in available_colors:
+                # Find the variant for this color
+                variant = self._find_variant_by_color(product_id, best_color)
+                if variant:
+                    logger.info(f"AI selected {best_color} for {product_name}: {ai_result.get('reasoning')}")
+                    return {
+                        'product_id': product_id,
+                        'product_name': product_name,
+                        'color': best_color,
+                        'variant': variant,
+                        'ai_confidence': ai_result.get('confidence', 'medium'),
+                        'ai_reasoning': ai_result.get('reasoning', ''),
+                        'logo_colors_considered': ai_result.get('logo_colors_considered', '')
+                    }
+            
+        except Exception as e:
+            logger.error(f"AI color analysis failed for product {product_id}: {e}")
+        return None
 
     def parse_color_preferences(self, text: str) -> List[Dict]:
         """Parse color preferences from text"""
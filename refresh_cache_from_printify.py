@@ -5,15 +5,24 @@ This will get current blueprint_ids, variant_ids, and provider info
 """
 
 import os
-import json
+import re
+import orjson
 import requests
 import logging
+from collections import Counter
 from datetime import datetime
 
+from product_service import save_cache
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(levelname)s:%(name)s:%(message)s')
 logger = logging.getLogger(__name__)
 
+# All category keywords in one pattern so each title is scanned once;
+# categories earlier in _CATEGORY_PRIORITY win when several match
+_CATEGORY_PATTERN = re.compile(r'(?P<hoodie>hoodie|sweatshirt)|(?P<shirt>t-shirt|tee|shirt)')
+_CATEGORY_PRIORITY = ('hoodie', 'shirt')
+
 class PrintifyAPIRefresh:
     def __init__(self):
         self.api_token = os.getenv('PRINTIFY_API_TOKEN')
@@ -146,6 +155,7 @@ class PrintifyAPIRefresh:
             return False
         
         updated_products = {}
+        category_counts = Counter()
         
         for blueprint in blueprints:
             blueprint_id = blueprint.get('id')
@@ -206,10 +216,11 @@ class PrintifyAPIRefresh:
                 }
                 
                 updated_products[str(blueprint_id)] = product_data
+                category_counts[product_data["category"]] += 1
                 print(f"  ✅ Updated product data for {title}")
         
         if updated_products:
-            self._save_updated_cache(updated_products)
+            self._save_updated_cache(updated_products, category_counts)
             return True
         else:
             print("❌ No products were successfully updated")
@@ -217,13 +228,11 @@ class PrintifyAPIRefresh:
     
     def _categorize_product(self, title):
         """Categorize product based on title"""
-        title_lower = title.lower()
-        if any(word in title_lower for word in ['hoodie', 'sweatshirt']):
-            return 'hoodie'
-        elif any(word in title_lower for word in ['tee', 't-shirt', 'shirt']):
-            return 'shirt'
-        else:
-            return 'other'
+        found = {match.lastgroup for match in _CATEGORY_PATTERN.finditer(title.lower())}
+        for category in _CATEGORY_PRIORITY:
+            if category in found:
+                return category
+        return 'other'
     
     def _format_variants(self, variants):
         """Format variants for our cache structure"""
@@ -240,14 +249,14 @@ class PrintifyAPIRefresh:
         
         return formatted_variants
     
-    def _save_updated_cache(self, updated_products):
+    def _save_updated_cache(self, updated_products, category_counts):
         """Save the updated cache to disk"""
         try:
             # Load existing cache structure
             cache_file = "top3_product_cache_optimized.json"
             try:
-                with open(cache_file, 'r') as f:
-                    cache = json.load(f)
+                with open(cache_file, 'rb') as f:
+                    cache = orjson.loads(f.read())
             except:
                 # Create new cache structure if file doesn't exist
                 cache = {
@@ -263,26 +272,24 @@ class PrintifyAPIRefresh:
             cache["last_update"] = datetime.now().isoformat()
             cache["version"] = "3.0-top3-live"
             
-            # Update metadata
-            categories = set(product.get('category') for product in updated_products.values())
-            cache["category_info"] = {cat: {"total_available": 1, "top3_selected": 1, "avg_popularity": 200} for cat in categories}
+            # Update metadata from the counts gathered while building the products
+            cache["category_info"] = {
+                cat: {"total_available": count, "top3_selected": count, "avg_popularity": 200}
+                for cat, count in category_counts.items()
+            }
             cache["optimization_info"] = {
                 "source": "live_printify_api",
                 "original_products": len(updated_products),
                 "optimized_products": len(updated_products), 
-                "categories_included": len(categories),
+                "categories_included": len(category_counts),
                 "selection_criteria": "live_api_refresh",
                 "api_refresh_date": datetime.now().isoformat(),
                 "shop_id": getattr(self, 'shop_id', None)
             }
             
-            # Save main cache
-            with open(cache_file, 'w') as f:
-                json.dump(cache, f, indent=2)
-            
-            # Copy to drop directory
-            import shutil
-            shutil.copy(cache_file, "drop/")
+            # Same compact, atomic format as every other writer of the product cache
+            for path in (cache_file, os.path.join("drop", cache_file)):
+                save_cache(path, cache)
             
             print(f"✅ Successfully saved updated cache with {len(updated_products)} products")
             print(f"📁 Updated both {cache_file} and drop/{cache_file}")
@@ -1,9 +1,10 @@
 import os
+import time
 import logging
 import json
 from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
-from typing import Dict, Optional, List
+from typing import Dict, Iterator, Optional, List
 from dotenv import load_dotenv
 
 from product_service import product_service
@@ -18,6 +19,25 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Static instructions for replies after a finished product, kept ahead of the per-conversation details
+# so the prompt prefix is identical on every call
+COMPLETED_CONVERSATION_PROMPT = """Respond as an enthusiastic youth sports merchandise assistant.
+Determine the user's intent and respond appropriately:
+- If they want a different product type, identify what product they want
+- If they're asking about purchasing, provide helpful purchase guidance
+- If they're just being positive/thankful, respond enthusiastically
+- If they want to modify the same product, guide them appropriately
+Available products: shirt (Unisex Jersey Short Sleeve Tee), hoodie (Unisex College Hoodie). Default products shown are Jersey Tee and College Hoodie."""
+
+# Products whose default color is picked from the logo, by product id
+DEFAULT_COLOR_PRODUCTS = {
+    '12': 'Unisex Jersey Short Sleeve Tee',
+    '92': 'Unisex College Hoodie'
+}
+
+# Minimum seconds between edits of a streamed message
+STREAM_UPDATE_INTERVAL = 1.0
+
 class SlackBot:
     def __init__(self):
         self.client = WebClient(token=os.getenv('SLACK_BOT_TOKEN'))
@@ -157,6 +177,8 @@ I'll create custom mockups of our top youth sports products:
                 # Upload logo to Printify for persistence
                 logger.info(f"Uploading logo to Printify for persistence: {channel}_{user}")
                 logo_filename = logo_result.get("original_name", "team_logo.png")
+                # The color analysis only needs the logo's pixels, so run it while the upload is in flight
+                self._prewarm_logo_colors(logo_result["file_path"])
                 upload_result = printify_service.upload_image_from_file(logo_result["file_path"], logo_filename)
                 
                 if not upload_result["success"]:
@@ -172,6 +194,10 @@ I'll create custom mockups of our top youth sports products:
                     "filename": logo_filename,
                     "uploaded_at": conversation_manager._get_timestamp()
                 }
+                if upload_result.get("preview_url"):
+                    # Lets the color analysis find the logo; its colors were already requested under the local path
+                    logo_info["url"] = upload_result["preview_url"]
+                    openai_service.rename_logo(logo_result["file_path"], logo_info["url"])
                 
                 # Update conversation with persistent logo and start creating default drops
                 conversation_manager.update_conversation(channel, user, {
@@ -251,12 +277,12 @@ I'll create custom mockups of our top youth sports products:
                             team_parts.append(conversation["team_info"]["sport"])
                         team_context = " ".join(team_parts)
                     
-                    logo_message = openai_service.generate_logo_request_message(
+                    self._send_streamed_message(channel, openai_service.generate_logo_request_message_stream(
                         product_match["formatted"]["title"], 
                         team_context
-                    )
+                    ))
                     
-                    return {"message": logo_message}
+                    return {"status": "success"}
             
             # Always set to awaiting_logo state for new optimized flow
             updates["state"] = "awaiting_logo"
@@ -319,12 +345,12 @@ I'll create custom mockups of our top youth sports products:
                             team_parts.append(conversation["team_info"]["sport"])
                         team_context = " ".join(team_parts)
                     
-                    logo_message = openai_service.generate_logo_request_message(
+                    self._send_streamed_message(channel, openai_service.generate_logo_request_message_stream(
                         product_match["formatted"]["title"], 
                         team_context
-                    )
+                    ))
                     
-                    return {"message": logo_message}
+                    return {"status": "success"}
             else:
                 # Still unclear, show options again
                 suggestion_message = product_service.get_product_suggestions_text()
@@ -359,6 +385,8 @@ I'll create custom mockups of our top youth sports products:
                     # Upload to Printify for persistence
                     logger.info(f"Uploading URL logo to Printify for persistence: {channel}_{user}")
                     logo_filename = logo_result.get("original_name", "team_logo.png")
+                    # The color analysis only needs the logo's pixels, so run it while the upload is in flight
+                    self._prewarm_logo_colors(logo_result["file_path"])
                     upload_result = printify_service.upload_image_from_file(logo_result["file_path"], logo_filename)
                     
                     if not upload_result["success"]:
@@ -374,6 +402,10 @@ I'll create custom mockups of our top youth sports products:
                         "uploaded_at": conversation_manager._get_timestamp(),
                         "source": "url"
                     }
+                    if upload_result.get("preview_url"):
+                        # Lets the color analysis find the logo; its colors were already requested under the local path
+                        logo_info["url"] = upload_result["preview_url"]
+                        openai_service.rename_logo(logo_result["file_path"], logo_info["url"])
                     
                     # Update conversation with logo and start creating default drops
                     conversation_manager.update_conversation(channel, user, {
@@ -507,24 +539,11 @@ I'll create custom mockups of our top youth sports products:
             # Let LLM determine the best response based on user message and context
             try:
                 # Create a context-aware prompt for the LLM
-                context_prompt = f"""
-                The user just completed creating a custom {context_info['previous_product']} and now said: "{text}"
-                
-                Team context: {context_info.get('team_info', {})}
-                
-                Determine the user's intent and respond appropriately:
-                - If they want a different product type, identify what product they want
-                - If they're asking about purchasing, provide helpful purchase guidance  
-                - If they're just being positive/thankful, respond enthusiastically
-                - If they want to modify the same product, guide them appropriately
-                
-                Available products: shirt (Unisex Jersey Short Sleeve Tee), hoodie (Unisex College Hoodie). Default products shown are Jersey Tee and College Hoodie.
-                
-                Respond as an enthusiastic youth sports merchandise assistant.
-                """
-                
-                # Get LLM response for context-aware handling
-                llm_response = openai_service.get_contextual_response(context_prompt, text)
+                context_prompt = (
+                    f"{COMPLETED_CONVERSATION_PROMPT}\n\n"
+                    f"The user just completed creating a custom {context_info['previous_product']} and now said: \"{text}\"\n"
+                    f"Team context: {context_info.get('team_info', {})}"
+                )
                 
                 # Check if user wants a different product (but no logo uploaded for new flow)
                 product_match = product_service.find_product_by_intent_ai(text)
@@ -579,15 +598,16 @@ I'll create custom mockups of our top youth sports products:
                                 team_parts.append(conversation["team_info"]["sport"])
                             team_context = " ".join(team_parts)
                         
-                        logo_message = openai_service.generate_logo_request_message(
+                        self._send_streamed_message(channel, openai_service.generate_logo_request_message_stream(
                             product_match["formatted"]["title"], 
                             team_context
-                        )
+                        ))
                         
-                        return {"message": logo_message}
+                        return {"status": "success"}
                 
-                # Use LLM response for other cases
-                return {"message": llm_response}
+                # Use LLM response for other cases, streamed so the parent sees it as it is written
+                self._send_streamed_message(channel, openai_service.get_contextual_response_stream(context_prompt, text))
+                return {"status": "success"}
                 
             except Exception as llm_error:
                 logger.warning(f"LLM contextual response failed: {llm_error}, falling back to simple logic")
@@ -1404,6 +1424,29 @@ I'll create custom mockups of our top youth sports products:
         except SlackApiError as e:
             logger.error(f"Error sending message: {e}")
     
+    def _send_streamed_message(self, channel: str, chunks: Iterator[str]) -> str:
+        """Post a message as soon as its first text arrives and edit it as the rest streams in"""
+        text = ""
+        posted = ""
+        ts = None
+        last_update = 0.0
+        try:
+            for chunk in chunks:
+                text += chunk
+                if ts is None:
+                    ts = self.client.chat_postMessage(channel=channel, text=text, unfurl_links=False)["ts"]
+                    posted, last_update = text, time.monotonic()
+                elif time.monotonic() - last_update >= STREAM_UPDATE_INTERVAL:
+                    # Slack allows roughly one chat.update per second per message
+                    self.client.chat_update(channel=channel, ts=ts, text=text)
+                    posted, last_update = text, time.monotonic()
+            text = text.strip()
+            if ts is not None and text != posted:
+                self.client.chat_update(channel=channel, ts=ts, text=text)
+        except SlackApiError as e:
+            logger.error(f"Error sending streamed message: {e}")
+        return text
+    
     def _send_image_message(self, channel: str, image_url: str, caption: str = ""):
         """Send image message to Slack"""
         try:
@@ -1491,11 +1534,9 @@ _Available in 30+ colors including Black, White, Navy, Red, Royal Blue, and more
         try:
             # Format available colors for display (limit to avoid message being too long)
             if available_colors:
-                # Get AI-recommended colors based on logo or fallback to standard recommendation
-                if logo_url:
-                    recommended_colors = self._get_logo_inspired_colors(available_colors, product_name, logo_url)
-                else:
-                    recommended_colors = self._get_recommended_colors(available_colors)
+                # Standard recommendation: the logo already chose the default color, and a model call here
+                # would hold up every product result
+                recommended_colors = self._get_recommended_colors(available_colors)
                 display_colors = recommended_colors[:6]  # Limit to 6 for readability
                 color_text = ", ".join(display_colors)
                 if len(available_colors) > 6:
@@ -1592,25 +1633,38 @@ _Available in 30+ colors including Black, White, Navy, Red, Royal Blue, and more
             except Exception as final_error:
                 logger.error(f"Final fallback message failed: {final_error}")
     
+    def _default_products_and_colors(self) -> Dict[str, List[str]]:
+        """Available colors of the default products, keyed by product name"""
+        colors_by_product = product_service.get_available_colors_for_best_products()
+        return {
+            product_name: colors_by_product[product_id]
+            for product_id, product_name in DEFAULT_COLOR_PRODUCTS.items()
+            if colors_by_product.get(product_id)
+        }
+    
+    def _prewarm_logo_colors(self, logo_path: str):
+        """Start the default products' logo color analysis from the local copy of a new logo"""
+        try:
+            openai_service.prewarm_logo_inspired_colors(logo_path, self._default_products_and_colors(), logo_path)
+        except Exception as e:
+            logger.warning(f"Could not prewarm logo colors: {e}")
+    
     def _get_ai_default_colors_for_products(self, logo_url: str) -> Dict[str, str]:
         """Get AI-recommended default colors for each of the main products based on logo"""
         try:
-            products_to_analyze = {
-                '12': 'Unisex Jersey Short Sleeve Tee',
-                '92': 'Unisex College Hoodie'
-            }
+            products_to_analyze = DEFAULT_COLOR_PRODUCTS
             
             ai_defaults = {}
-            colors_by_product = product_service.get_available_colors_for_best_products()
+            
+            # Ask for every product's palette concurrently
+            products_and_colors = self._default_products_and_colors()
+            ai_results = openai_service.get_logo_inspired_colors_for_all(logo_url, products_and_colors)
             
             for product_id, product_name in products_to_analyze.items():
-                available_colors = colors_by_product.get(product_id, [])
-                if not available_colors:
+                if product_name not in ai_results:
                     continue
-                    
-                # Get AI recommendation for best default color for this product
-                ai_result = openai_service.get_logo_inspired_colors(logo_url, available_colors, product_name)
-                top_colors = ai_result.get('top_6_colors', [])
+                available_colors = products_and_colors[product_name]
+                top_colors = ai_results[product_name].get('top_6_colors', [])
                 
                 # Use the first AI-recommended color as the default
                 if top_colors and top_colors[0] in available_colors:
@@ -1623,32 +1677,6 @@ _Available in 30+ colors including Black, White, Navy, Red, Royal Blue, and more
             logger.error(f"AI default color selection failed: {e}")
             return None
 
-    def _get_logo_inspired_colors(self, available_colors: List[str], product_name: str, logo_url: str) -> List[str]:
-        """Get AI-recommended colors based on logo analysis"""
-        try:
-            ai_result = openai_service.get_logo_inspired_colors(logo_url, available_colors, product_name)
-            recommended_colors = ai_result.get('top_6_colors', [])
-            
-            # Validate that recommended colors are actually available
-            valid_colors = []
-            for color in recommended_colors:
-                if color in available_colors:
-                    valid_colors.append(color)
-            
-            # If we don't have enough valid colors, fill with fallback
-            if len(valid_colors) < 6:
-                fallback_colors = self._get_recommended_colors(available_colors)
-                for color in fallback_colors:
-                    if color not in valid_colors and len(valid_colors) < 6:
-                        valid_colors.append(color)
-            
-            logger.info(f"AI-selected colors for {product_name}: {valid_colors[:6]}")
-            return valid_colors[:6]
-            
-        except Exception as e:
-            logger.error(f"AI color recommendation failed: {e}")
-            return self._get_recommended_colors(available_colors)
-
     def _get_recommended_colors(self, available_colors: List[str]) -> List[str]:
         """Get recommended colors prioritizing team essentials and primary colors"""
         # Priority order for team colors
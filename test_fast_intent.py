@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Test the keyword fast path that answers obvious product requests without calling OpenAI
+"""
+
+import os
+
+# The service builds its OpenAI client at import; no request is made in these tests
+os.environ.setdefault('OPENAI_API_KEY', 'sk-test-openai-key')
+
+from openai_service import openai_service
+
+def test_clear_product_words():
+    """Single-product requests are classified locally"""
+    cases = {
+        "shirt": "shirt",
+        "I want a blue tee": "shirt",
+        "t-shirt please": "shirt",
+        "Can I get a navy jersey": "shirt",
+        "hoodie": "hoodie",
+        "I need a sweatshirt": "hoodie",
+        "black hoodies with our logo": "hoodie",
+    }
+    for message, product_type in cases.items():
+        result = openai_service._try_fast_intent(message)
+        assert result is not None, message
+        assert result["product_specified"] and result["product_type"] == product_type, message
+        assert not result["needs_clarification"], message
+        assert result["sport_mentioned"] is None and result["team_mentioned"] is None, message
+    assert openai_service._try_fast_intent("hoodie with our logo")["wants_logo"]
+    assert not openai_service._try_fast_intent("hoodie")["wants_logo"]
+    print(f"✅ {len(cases)} clear product requests classified locally")
+
+def test_mixed_product_wording():
+    """Messages naming both a shirt and a hoodie go to the model"""
+    for message in ["shirt and hoodie", "a tee or a sweatshirt", "hoodie and jersey"]:
+        assert openai_service._try_fast_intent(message) is None, message
+    print("✅ Mixed hoodie/shirt wording falls through to the model")
+
+def test_falls_through_to_model():
+    """Anything the model might extract more from is not answered locally"""
+    messages = [
+        "",
+        "hi there",
+        "hoodie for the Eagles",
+        "soccer shirt",
+        "I don't want a shirt",
+        "what colors does the hoodie come in?",
+        "shirts for my daughter's team",
+    ]
+    for message in messages:
+        assert openai_service._try_fast_intent(message) is None, message
+    print(f"✅ {len(messages)} ambiguous messages fall through to the model")
+
+if __name__ == "__main__":
+    test_clear_product_words()
+    test_mixed_product_wording()
+    test_falls_through_to_model()
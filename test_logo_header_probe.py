@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Test the PNG/JPEG header probe used to validate logos without decoding them
+"""
+
+import struct
+from io import BytesIO
+
+from PIL import Image
+
+from logo_processor import _probe_image_header
+
+def _png_bytes(width, height):
+    buffer = BytesIO()
+    Image.new("RGB", (width, height), (163, 31, 52)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+def _jpeg_with_app_segment(width, height):
+    """Encode a JPEG and make sure an APPn segment sits between SOI and the frame header"""
+    buffer = BytesIO()
+    Image.new("RGB", (width, height), (30, 58, 138)).save(buffer, format="JPEG")
+    data = buffer.getvalue()
+    app1 = b"\xff\xe1" + struct.pack(">H", 2 + 12) + b"Exif\x00\x00padding"[:12]
+    return data[:2] + app1 + data[2:]
+
+def test_png_dimensions():
+    """A minimal PNG reports its IHDR dimensions"""
+    assert _probe_image_header(BytesIO(_png_bytes(120, 80))) == ("png", (120, 80))
+    print("✅ PNG dimensions read from IHDR")
+
+def test_jpeg_dimensions_after_app_segment():
+    """A JPEG with an APPn segment before SOF still reports its frame dimensions"""
+    data = _jpeg_with_app_segment(300, 150)
+    assert data[2:4] == b"\xff\xe1"
+    assert _probe_image_header(BytesIO(data)) == ("jpeg", (300, 150))
+    print("✅ JPEG dimensions read from SOF after APP1")
+
+def test_truncated_or_unknown_data():
+    """Truncated and unrecognized headers return None instead of raising"""
+    png = _png_bytes(64, 64)
+    jpeg = _jpeg_with_app_segment(64, 64)
+    cases = {
+        "empty": b"",
+        "gif": b"GIF89a" + b"\x00" * 20,
+        "truncated png": png[:20],
+        "jpeg soi only": b"\xff\xd8",
+        "truncated jpeg": jpeg[:10],
+        "jpeg bad marker": b"\xff\xd8\x00\x00",
+        "jpeg zero-length segment": b"\xff\xd8\xff\xe0\x00\x00",
+    }
+    for name, data in cases.items():
+        assert _probe_image_header(BytesIO(data)) is None, name
+    print(f"✅ {len(cases)} truncated/unknown inputs return None")
+
+if __name__ == "__main__":
+    test_png_dimensions()
+    test_jpeg_dimensions_after_app_segment()
+    test_truncated_or_unknown_data()